@@ -1,18 +1,47 @@
 # ai-service/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-import requests
+import atexit
 from datetime import datetime, timedelta
-import json
 import logging
+import time
+import uuid
+
+import numpy as np
+
+from models.batch_assignment import assign_batch
+from models.calendar_context import CalendarContext, HolidayCalendar, parse_extra_dates
+from models.geo import point_distance_km
+from models.match_engine import MAX_DISTANCE_KM, pack_recipients, pack_typed_recipients, stream_top_matches
+from models.outcome_learner import OutcomeLearner
+from models.ranking_session import RankingSession, RankingSessionStore
+from models.recipient_index import RecipientRegistry
+from models.recipient_store import RecipientStore
+from models.schemas import MatchRequest
+from models.surplus_prediction import encode_business_type
+from models.text_analysis import (
+    analyze_text, categories_from_keywords, find_keywords,
+    freshness_from_keywords, quality_from_keywords
+)
+from services.analysis_cache import AnalysisCache, content_key
+from services.fanout import Lookup, fan_out
+from services.http_client import CircuitOpenError, create_client
+from services.metrics import init_metrics, stage_timer
+from services.micro_batcher import MicroBatcher
+from services.profiling import init_profiling
+from services.serialization import BodyDecodeError, decode_body, decode_json, encode_json, init_serialization, to_builtins
+from services.weather_cache import WeatherCache
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+init_serialization(app)
+init_metrics(app)
+init_profiling(app)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,16 +50,90 @@ logger = logging.getLogger(__name__)
 # Hugging Face API configuration
 HF_API_KEY = os.getenv('HUGGING_FACE_API_KEY')
 HF_HEADERS = {"Authorization": f"Bearer {HF_API_KEY}"}
+HF_SENTIMENT_URL = os.getenv(
+    'HF_SENTIMENT_URL',
+    "https://api-inference.huggingface.co/models/cardiffnlp/twitter-roberta-base-sentiment-latest"
+)
+DEFAULT_SENTIMENT = [{"label": "NEUTRAL", "score": 0.5}]
 
 # API endpoints
 WEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
-WEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
+WEATHER_BASE_URL = os.getenv('WEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5/weather")
+WEATHER_FORECAST_URL = os.getenv('WEATHER_FORECAST_URL', "http://api.openweathermap.org/data/2.5/forecast")
+
+# Pooled outbound clients; while an upstream keeps failing its circuit opens
+# and callers fall back to their defaults without waiting on it
+weather_client = create_client('openweathermap', timeout=5)
+hf_client = create_client('huggingface', timeout=10)
+
+# Time and holiday features come from per-day tables; HOLIDAY_REGION picks
+# the public holiday calendar and HOLIDAY_EXTRA_DATES adds local dates
+# (comma-separated MM-DD every year or YYYY-MM-DD once)
+calendar_context = CalendarContext(HolidayCalendar(
+    region=os.getenv('HOLIDAY_REGION', 'US'),
+    extra_dates=parse_extra_dates(os.getenv('HOLIDAY_EXTRA_DATES'))
+))
+RESTAURANT_CODE = encode_business_type('restaurant')
+
+# Surplus model: 'rule' uses calculate_surplus_prediction, 'ml' loads the
+# trained SurplusPredictionModel artifact once per worker at startup
+SURPLUS_MODEL_MODE = os.getenv('SURPLUS_MODEL_MODE', 'rule')
+SURPLUS_MODEL_PATH = os.getenv('SURPLUS_MODEL_PATH', os.path.join('models', 'artifacts', 'surplus_model.joblib'))
+
+# Reported surplus outcomes keep a moving average per business that replaces
+# the caller's historical_avg_surplus once it has OUTCOME_MIN_OBSERVATIONS;
+# set OUTCOME_CHECKPOINT_PATH to keep it across restarts and share it between
+# workers
+outcome_learner = OutcomeLearner(
+    alpha=float(os.getenv('OUTCOME_EMA_ALPHA', 0.2)),
+    min_observations=int(os.getenv('OUTCOME_MIN_OBSERVATIONS', 3)),
+    checkpoint_path=os.getenv('OUTCOME_CHECKPOINT_PATH'),
+    checkpoint_interval=float(os.getenv('OUTCOME_CHECKPOINT_INTERVAL', 60))
+)
+atexit.register(outcome_learner.checkpoint)
+
+# Hourly surplus curves: default and longest horizon a request may ask for
+SURPLUS_HORIZON_HOURS = int(os.getenv('SURPLUS_HORIZON_HOURS', 24))
+SURPLUS_HORIZON_MAX_HOURS = int(os.getenv('SURPLUS_HORIZON_MAX_HOURS', 72))
+
+# Deadlines (seconds) for the lookups behind one surplus prediction
+PREDICTION_DEADLINE = float(os.getenv('PREDICTION_DEADLINE', 4))
+WEATHER_LOOKUP_TIMEOUT = float(os.getenv('WEATHER_LOOKUP_TIMEOUT', 3))
+
+# Demand batches are computed in chunks of DEMAND_CHUNK_SIZE locations
+NDJSON_MIMETYPE = 'application/x-ndjson'
+NDJSON_READ_SIZE = 64 * 1024
+DEMAND_CHUNK_SIZE = int(os.getenv('DEMAND_CHUNK_SIZE', 5000))
+
+# Batch matching: candidates kept per item and the most time a batch may take
+MATCH_BATCH_TOP_K = int(os.getenv('MATCH_BATCH_TOP_K', 10))
+MATCH_BATCH_BUDGET_MS = float(os.getenv('MATCH_BATCH_BUDGET_MS', 5000))
+
+# Ranking sessions keep precomputed pair scores. MATCH_SESSION_DIR shares
+# them between workers (any worker can refresh a session); without it a
+# session only lives in the worker that created it, so run a single worker.
+# Each worker keeps at most MATCH_SESSION_CACHE_PAIRS pairs in memory
+# (24 bytes each).
+MATCH_SESSION_TTL = int(os.getenv('MATCH_SESSION_TTL', 1800))
+MATCH_SESSION_MAX_PAIRS = int(os.getenv('MATCH_SESSION_MAX_PAIRS', 1_000_000))
+match_sessions = RankingSessionStore(
+    directory=os.getenv('MATCH_SESSION_DIR'),
+    ttl=MATCH_SESSION_TTL,
+    cache_pairs=int(os.getenv('MATCH_SESSION_CACHE_PAIRS', 2_000_000))
+)
+
+# Recipient registry (set RECIPIENT_REGISTRY_PATH to share it across workers)
+recipient_registry = RecipientRegistry(
+    cell_size_deg=float(os.getenv('RECIPIENT_INDEX_CELL_DEG', 0.5)),
+    snapshot_path=os.getenv('RECIPIENT_REGISTRY_PATH')
+)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         "status": "OK",
         "message": "FoodBridge AI Service is running!",
+        "surplus_model": 'ml' if surplus_model else 'rule',
         "timestamp": datetime.now().isoformat()
     })
 
@@ -41,17 +144,26 @@ def health_check():
 @app.route('/api/predict/surplus', methods=['POST'])
 def predict_surplus():
     try:
+        outcome_learner.refresh()
         data = request.json
         business_id = data.get('business_id')
         
-        # Get weather data for location
-        weather_data = get_weather_data(data.get('lat'), data.get('lng'))
+        # Run all enrichment lookups at once; any that miss the deadline
+        # fall back to their defaults
+        enrichment = fan_out({
+            'weather': Lookup(get_weather_data, data.get('lat'), data.get('lng'), timeout=WEATHER_LOOKUP_TIMEOUT)
+        }, deadline=PREDICTION_DEADLINE)
+        weather_data = enrichment['weather']
         
         # Prepare features for prediction
-        features = prepare_prediction_features(data, weather_data)
+        with stage_timer('feature_prep'):
+            features = prepare_prediction_features(data, weather_data)
         
-        # Make prediction using simple model
-        prediction = calculate_surplus_prediction(features)
+        # Make prediction using the trained model if loaded, else simple rules
+        started = time.perf_counter()
+        with stage_timer('surplus_inference'):
+            prediction = predict_surplus_from_features(data, features)
+        inference_ms = (time.perf_counter() - started) * 1000
         
         # Generate recommendation
         recommendation = generate_surplus_recommendation(prediction['predicted_surplus'])
@@ -64,7 +176,7 @@ def predict_surplus():
             "weather_impact": weather_data['impact'] if weather_data else None
         }
         
-        logger.info(f"Surplus prediction for business {business_id}: {prediction['predicted_surplus']} kg")
+        logger.info(f"Surplus prediction for business {business_id}: {prediction['predicted_surplus']} kg ({inference_ms:.1f} ms)")
         
         return jsonify(response)
         
@@ -72,23 +184,120 @@ def predict_surplus():
         logger.error(f"Surplus prediction error: {str(e)}")
         return jsonify({"error": "Prediction failed"}), 500
 
-def prepare_prediction_features(data, weather_data):
+@app.route('/api/predict/surplus/batch', methods=['POST'])
+def predict_surplus_batch():
+    """Predict surplus for many businesses in one vectorized pass"""
+    try:
+        outcome_learner.refresh()
+        data = request.json
+        businesses = data.get('businesses', [])
+        
+        if not businesses:
+            return jsonify({"error": "Businesses required"}), 400
+        
+        # One weather lookup per location cell, shared by nearby businesses
+        weather_by_cell = {}
+        weather = []
+        for business in businesses:
+            lat, lng = business.get('lat'), business.get('lng')
+            if not WEATHER_API_KEY or not lat or not lng:
+                weather.append(None)
+                continue
+            cell = weather_cache.cell(lat, lng)
+            if cell not in weather_by_cell:
+                weather_by_cell[cell] = get_weather_data(lat, lng)
+            weather.append(weather_by_cell[cell])
+        
+        now = datetime.now()
+        features = [
+            prepare_prediction_features(business, weather_data, now=now)
+            for business, weather_data in zip(businesses, weather)
+        ]
+        predictions = predict_surplus_batch_from_features(businesses, features)
+        
+        results = []
+        for business, weather_data, prediction in zip(businesses, weather, predictions):
+            results.append({
+                "business_id": business.get('business_id'),
+                "predicted_surplus": prediction['predicted_surplus'],
+                "confidence": prediction['confidence'],
+                "recommendation": generate_surplus_recommendation(prediction['predicted_surplus']),
+                "factors": prediction['factors'],
+                "weather_impact": weather_data['impact'] if weather_data else None
+            })
+        
+        logger.info(f"Batch surplus prediction for {len(results)} businesses ({len(weather_by_cell)} weather lookups)")
+        
+        return jsonify({
+            'predictions': results,
+            'total_processed': len(results)
+        })
+        
+    except Exception as e:
+        logger.error(f"Batch surplus prediction error: {str(e)}")
+        return jsonify({"error": "Batch prediction failed"}), 500
+
+@app.route('/api/predict/surplus/horizon', methods=['POST'])
+def predict_surplus_horizon():
+    """Hourly surplus curve for the next horizon_hours from one forecast lookup"""
+    try:
+        outcome_learner.refresh()
+        data = request.json
+        business_id = data.get('business_id')
+        try:
+            horizon = int(data.get('horizon_hours', SURPLUS_HORIZON_HOURS))
+        except (TypeError, ValueError):
+            return jsonify({"error": "horizon_hours must be a whole number of hours"}), 400
+        horizon = max(1, min(horizon, SURPLUS_HORIZON_MAX_HOURS))
+        
+        start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        moments = [start + timedelta(hours=hour) for hour in range(horizon)]
+        
+        forecast = fan_out({
+            'forecast': Lookup(get_weather_forecast, data.get('lat'), data.get('lng'), timeout=WEATHER_LOOKUP_TIMEOUT)
+        }, deadline=PREDICTION_DEADLINE)['forecast']
+        
+        with stage_timer('feature_prep'):
+            columns = build_horizon_columns(data, moments, forecast)
+        
+        started = time.perf_counter()
+        with stage_timer('surplus_inference'):
+            predictions = predict_surplus_from_columns(columns)
+        inference_ms = (time.perf_counter() - started) * 1000
+        
+        curve = [
+            {"time": moment.isoformat(), **prediction}
+            for moment, prediction in zip(moments, predictions)
+        ]
+        peak = max(curve, key=lambda hour: hour['predicted_surplus'])
+        
+        response = {
+            "business_id": business_id,
+            "horizon_hours": horizon,
+            "curve": curve,
+            "total_predicted_surplus": round(sum(hour['predicted_surplus'] for hour in curve), 1),
+            "peak": {"time": peak['time'], "predicted_surplus": peak['predicted_surplus']},
+            "recommendation": generate_surplus_recommendation(peak['predicted_surplus']),
+            "weather_forecast": forecast is not None
+        }
+        
+        logger.info(f"Surplus horizon for business {business_id}: {horizon} hours ({inference_ms:.1f} ms)")
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        logger.error(f"Surplus horizon prediction error: {str(e)}")
+        return jsonify({"error": "Horizon prediction failed"}), 500
+
+def prepare_prediction_features(data, weather_data, now=None):
     """Prepare features for surplus prediction"""
-    now = datetime.now()
-    
-    # Time-based features
-    features = {
-        'hour': now.hour,
-        'day_of_week': now.weekday(),
-        'is_weekend': now.weekday() >= 5,
-        'is_rush_hour': now.hour in [11, 12, 18, 19, 20],
-        'season': (now.month % 12) // 3 + 1
-    }
+    # Time-based and holiday features, looked up from today's table
+    features = calendar_context.features_at(now or datetime.now())
     
     # Business features
     features.update({
-        'business_type': hash(data.get('business_type', 'restaurant')) % 10,
-        'historical_avg': data.get('historical_avg_surplus', 15.0),
+        'business_type': encode_business_type(data.get('business_type', 'restaurant')),
+        'historical_avg': historical_average(data),
         'capacity': data.get('capacity', 100),
         'promotion_active': data.get('has_promotion', False)
     })
@@ -102,13 +311,17 @@ def prepare_prediction_features(data, weather_data):
         })
     
     # Event features
-    features.update({
-        'local_events': data.get('event_score', 0),
-        'is_holiday': is_holiday(now)
-    })
+    features['local_events'] = data.get('event_score', 0)
     
     return features
 
+def historical_average(data):
+    """The business's learned average surplus when it has enough outcomes, else the caller's"""
+    learned = outcome_learner.average(data.get('business_id'))
+    if learned is None:
+        return data.get('historical_avg_surplus', 15.0)
+    return learned
+
 def calculate_surplus_prediction(features):
     """Simple rule-based surplus prediction model"""
     
@@ -132,7 +345,7 @@ def calculate_surplus_prediction(features):
     
     # Business type adjustments
     business_multiplier = 1.0
-    if features['business_type'] % 3 == 0:  # Restaurants
+    if features['business_type'] == RESTAURANT_CODE:
         business_multiplier *= 1.1
     
     # Event adjustments
@@ -166,6 +379,193 @@ def calculate_surplus_prediction(features):
         'factors': factors
     }
 
+def predict_surplus_from_features(data, features):
+    """Predict surplus with the trained model, keeping rule-based factors"""
+    prediction = calculate_surplus_prediction(features)
+    if surplus_model is None:
+        return prediction
+    
+    predictions, confidence = surplus_model.predict_records([build_model_features(data, features)])
+    prediction.update({
+        'predicted_surplus': round(float(predictions[0]), 1),
+        'confidence': round(float(confidence[0]), 2)
+    })
+    return prediction
+
+def build_model_features(data, features):
+    """Map request features onto the trained model's feature columns"""
+    return {
+        'day_of_week': features['day_of_week'],
+        'hour': features['hour'],
+        'weather_temp': features.get('temperature', 20),
+        'weather_condition': features.get('weather_condition', 0),
+        'local_events': features['local_events'],
+        'historical_surplus': features['historical_avg'],
+        'business_type': data.get('business_type', 'restaurant'),
+        'season': features['season'],
+        'holiday_indicator': features['is_holiday'],
+        'promotion_active': features['promotion_active']
+    }
+
+def load_surplus_model():
+    """Load the trained surplus model when SURPLUS_MODEL_MODE is 'ml'"""
+    if SURPLUS_MODEL_MODE != 'ml':
+        return None
+    
+    try:
+        from models.surplus_prediction import SurplusPredictionModel
+        
+        model = SurplusPredictionModel.load(SURPLUS_MODEL_PATH)
+        logger.info(f"Loaded surplus model {SURPLUS_MODEL_PATH} in {model.load_seconds * 1000:.0f} ms")
+        return model
+    except Exception as e:
+        logger.error(f"Surplus model load error, using rule-based predictions: {str(e)}")
+        return None
+
+surplus_model = load_surplus_model()
+
+def calculate_surplus_predictions(features_list):
+    """Vectorized calculate_surplus_prediction over many feature dicts"""
+    def column(name, default=0):
+        return np.array([features.get(name, default) for features in features_list], dtype=float)
+    
+    columns = {
+        name: column(name)
+        for name in ('historical_avg', 'is_weekend', 'is_rush_hour', 'precipitation', 'business_type', 'local_events')
+    }
+    columns['temperature'] = column('temperature', 20)
+    columns['has_weather'] = np.array(['temperature' in features for features in features_list], dtype=bool)
+    return calculate_surplus_columns(columns)
+
+def calculate_surplus_columns(columns):
+    """calculate_surplus_prediction over equal-length feature columns"""
+    base_surplus = columns['historical_avg']
+    has_weather = columns['has_weather']
+    size = len(base_surplus)
+    
+    # Multipliers are applied in the same order as the scalar version so
+    # every prediction is bit-for-bit identical to it
+    time_multiplier = np.ones(size)
+    time_multiplier = np.where(columns['is_weekend'] != 0, time_multiplier * 1.2, time_multiplier)
+    time_multiplier = np.where(columns['is_rush_hour'] != 0, time_multiplier * 0.8, time_multiplier)
+    
+    temperature = columns['temperature']
+    weather_multiplier = np.ones(size)
+    extreme = has_weather & ((temperature < 5) | (temperature > 35))
+    weather_multiplier = np.where(extreme, weather_multiplier * 1.3, weather_multiplier)
+    rain = has_weather & (columns['precipitation'] > 0)
+    weather_multiplier = np.where(rain, weather_multiplier * 1.4, weather_multiplier)
+    
+    business_multiplier = np.where(columns['business_type'] == RESTAURANT_CODE, 1.0 * 1.1, 1.0)
+    event_multiplier = 1.0 - (columns['local_events'] * 0.1)
+    
+    predicted_surplus = base_surplus * time_multiplier * weather_multiplier * business_multiplier * event_multiplier
+    
+    confidence = np.full(size, 0.7)
+    confidence = np.where(has_weather, confidence + 0.1, confidence)
+    confidence = np.where(base_surplus > 0, confidence + 0.15, confidence)
+    confidence = np.minimum(0.95, confidence)
+    
+    predictions = []
+    for surplus, conf, time_mult, weather_mult, event_mult in zip(
+        predicted_surplus.tolist(), confidence.tolist(), time_multiplier.tolist(),
+        weather_multiplier.tolist(), event_multiplier.tolist()
+    ):
+        factors = []
+        if time_mult > 1.1:
+            factors.append("Weekend increase expected")
+        if weather_mult > 1.2:
+            factors.append("Weather impact: reduced foot traffic")
+        if event_mult < 0.9:
+            factors.append("Local events may reduce surplus")
+        
+        predictions.append({
+            'predicted_surplus': round(max(0, surplus), 1),
+            'confidence': round(conf, 2),
+            'factors': factors
+        })
+    
+    return predictions
+
+def predict_surplus_batch_from_features(data_list, features_list):
+    """Batch predict_surplus_from_features with a single model call"""
+    predictions = calculate_surplus_predictions(features_list)
+    if surplus_model is None:
+        return predictions
+    
+    records = [build_model_features(data, features) for data, features in zip(data_list, features_list)]
+    surplus, confidence = surplus_model.predict_records(records)
+    for prediction, predicted, conf in zip(predictions, surplus.tolist(), confidence.tolist()):
+        prediction.update({
+            'predicted_surplus': round(predicted, 1),
+            'confidence': round(conf, 2)
+        })
+    return predictions
+
+def build_horizon_columns(data, moments, forecast):
+    """Feature columns for one business at every hour in `moments`, built in one step"""
+    columns = calendar_context.features_for(moments)
+    size = len(moments)
+    
+    def constant(value):
+        return np.full(size, value, dtype=float)
+    
+    columns.update({
+        'business_type': constant(encode_business_type(data.get('business_type', 'restaurant'))),
+        'historical_avg': constant(historical_average(data)),
+        'promotion_active': constant(data.get('has_promotion', False)),
+        'local_events': constant(data.get('event_score', 0))
+    })
+    
+    if forecast:
+        # Each hour takes the latest forecast slot starting at or before it
+        epochs = moments[0].timestamp() + 3600 * np.arange(size)
+        slots = np.maximum(np.searchsorted(forecast['times'], epochs, side='right') - 1, 0)
+        columns.update({
+            'temperature': forecast['temperature'][slots],
+            'weather_condition': forecast['condition_code'][slots],
+            'precipitation': forecast['rain'][slots],
+            'has_weather': np.ones(size, dtype=bool)
+        })
+    else:
+        columns.update({
+            'temperature': constant(20),
+            'weather_condition': constant(0),
+            'precipitation': constant(0),
+            'has_weather': np.zeros(size, dtype=bool)
+        })
+    
+    return columns
+
+def build_model_columns(columns):
+    """Map horizon feature columns onto the trained model's feature columns"""
+    return {
+        'day_of_week': columns['day_of_week'],
+        'hour': columns['hour'],
+        'weather_temp': columns['temperature'],
+        'weather_condition': columns['weather_condition'],
+        'local_events': columns['local_events'],
+        'historical_surplus': columns['historical_avg'],
+        'business_type': columns['business_type'],
+        'season': columns['season'],
+        'holiday_indicator': columns['is_holiday'],
+        'promotion_active': columns['promotion_active']
+    }
+
+def predict_surplus_from_columns(columns):
+    """Predictions for every row of the feature columns with a single model call"""
+    predictions = calculate_surplus_columns(columns)
+    if surplus_model is None:
+        return predictions
+    
+    surplus, confidence = surplus_model.predict_columns(build_model_columns(columns))
+    for prediction, predicted, conf in zip(predictions, surplus.tolist(), confidence.tolist()):
+        prediction.update({
+            'predicted_surplus': round(predicted, 1),
+            'confidence': round(conf, 2)
+        })
+    return predictions
+
 def generate_surplus_recommendation(surplus_amount):
     """Generate actionable recommendations based on predicted surplus"""
     if surplus_amount > 50:
@@ -178,13 +578,18 @@ def generate_surplus_recommendation(surplus_amount):
         return "Minimal surplus expected. Focus on portion control and accurate demand forecasting."
 
 def get_weather_data(lat, lng):
-    """Get weather data from OpenWeatherMap API"""
+    """Get weather data for a location, cached per nearby area"""
     if not WEATHER_API_KEY or not lat or not lng:
         return None
     
+    return weather_cache.get(lat, lng)
+
+def fetch_weather_data(lat, lng):
+    """Get weather data from OpenWeatherMap API"""
     try:
         url = f"{WEATHER_BASE_URL}?lat={lat}&lon={lng}&appid={WEATHER_API_KEY}&units=metric"
-        response = requests.get(url, timeout=5)
+        with stage_timer('weather_fetch'):
+            response = weather_client.get(url)
         data = response.json()
         
         if response.status_code == 200:
@@ -195,11 +600,43 @@ def get_weather_data(lat, lng):
                 'rain': data.get('rain', {}).get('1h', 0),
                 'impact': calculate_weather_impact(data)
             }
+    except CircuitOpenError:
+        pass
     except Exception as e:
         logger.error(f"Weather API error: {str(e)}")
     
     return None
 
+def get_weather_forecast(lat, lng):
+    """Get the weather forecast for a location, cached per nearby area"""
+    if not WEATHER_API_KEY or not lat or not lng:
+        return None
+    
+    return forecast_cache.get(lat, lng)
+
+def fetch_weather_forecast(lat, lng):
+    """Get the 3-hourly, 5 day forecast from OpenWeatherMap as columns"""
+    try:
+        url = f"{WEATHER_FORECAST_URL}?lat={lat}&lon={lng}&appid={WEATHER_API_KEY}&units=metric"
+        with stage_timer('weather_forecast_fetch'):
+            response = weather_client.get(url)
+        data = response.json()
+        
+        if response.status_code == 200 and data.get('list'):
+            slots = data['list']
+            return {
+                'times': np.array([slot['dt'] for slot in slots], dtype=float),
+                'temperature': np.array([slot['main']['temp'] for slot in slots], dtype=float),
+                'condition_code': np.array([slot['weather'][0]['id'] for slot in slots], dtype=float),
+                'rain': np.array([slot.get('rain', {}).get('3h', 0) for slot in slots], dtype=float)
+            }
+    except CircuitOpenError:
+        pass
+    except Exception as e:
+        logger.error(f"Weather forecast API error: {str(e)}")
+    
+    return None
+
 def calculate_weather_impact(weather_data):
     """Calculate weather impact on food demand"""
     temp = weather_data['main']['temp']
@@ -216,17 +653,65 @@ def calculate_weather_impact(weather_data):
     
     return impact
 
+# Weather changes slowly and nearby businesses see the same conditions, so
+# lookups are shared per ~11 km cell (1 decimal place) for 10 minutes
+weather_cache = WeatherCache(
+    fetch_weather_data,
+    precision=int(os.getenv('WEATHER_CACHE_PRECISION', 1)),
+    ttl=float(os.getenv('WEATHER_CACHE_TTL', 600)),
+    stale_ttl=float(os.getenv('WEATHER_CACHE_STALE_TTL', 1800)),
+    max_entries=int(os.getenv('WEATHER_CACHE_SIZE', 1024))
+)
+
+# Forecasts are refreshed by the upstream every few hours, so they are kept
+# longer than current conditions
+forecast_cache = WeatherCache(
+    fetch_weather_forecast,
+    precision=int(os.getenv('WEATHER_CACHE_PRECISION', 1)),
+    ttl=float(os.getenv('WEATHER_FORECAST_TTL', 1800)),
+    stale_ttl=float(os.getenv('WEATHER_FORECAST_STALE_TTL', 3600)),
+    max_entries=int(os.getenv('WEATHER_CACHE_SIZE', 1024)),
+    name='weather_forecast'
+)
+
 def is_holiday(date):
-    """Simple holiday detection (extend as needed)"""
-    # Basic holiday detection - extend with proper holiday calendar
-    month_day = (date.month, date.day)
-    holidays = [
-        (1, 1),   # New Year
-        (12, 25), # Christmas
-        (7, 4),   # Independence Day (US)
-        (11, 11), # Veterans Day
-    ]
-    return month_day in holidays
+    """Whether a date is a public holiday in HOLIDAY_REGION (or a configured extra date)"""
+    return calendar_context.calendar.is_holiday(date)
+
+@app.route('/api/outcomes', methods=['POST'])
+def ingest_outcomes():
+    """Record actual surplus outcomes; each updates its business's learned average"""
+    try:
+        data = request.json
+        outcomes = data.get('outcomes') or ([data] if data.get('business_id') is not None else [])
+        
+        if not outcomes:
+            return jsonify({"error": "Outcomes required"}), 400
+        
+        with stage_timer('outcome_ingest'):
+            ingested = outcome_learner.ingest(outcomes)
+        
+        return jsonify({
+            'ingested': ingested,
+            'total_businesses': len(outcome_learner)
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Outcome ingest error: {str(e)}")
+        return jsonify({"error": "Outcome ingest failed"}), 500
+
+@app.route('/api/outcomes/<business_id>', methods=['GET'])
+def business_outcomes(business_id):
+    """Learned surplus state for one business"""
+    outcome_learner.refresh()
+    state = outcome_learner.describe(business_id)
+    
+    if state is None:
+        return jsonify({"error": "No outcomes for business"}), 404
+    
+    return jsonify(state)
 
 # ============================================================================
 # SMART MATCHING ALGORITHM
@@ -235,43 +720,162 @@ def is_holiday(date):
 @app.route('/api/match/food', methods=['POST'])
 def match_food_with_recipients():
     try:
-        data = request.json
-        food_item = data.get('food_item')
-        recipients = data.get('recipients', [])
+        food_item, recipients, nearest, pack = read_match_request()
         
-        if not food_item or not recipients:
+        if food_item and recipients is None and len(recipient_registry):
+            # No recipient list sent: score registered recipients near the food
+            urgency_score = calculate_urgency_score(food_item)
+            top_matches, total_matches = find_registered_matches(food_item, urgency_score, nearest)
+        elif not food_item or not recipients:
             return jsonify({"error": "Food item and recipients required"}), 400
+        else:
+            # Score recipients chunk by chunk, keeping only the best 5
+            urgency_score = calculate_urgency_score(food_item)
+            top_matches, total_matches = stream_top_matches(food_item, recipients, urgency_score, limit=5,
+                                                            timer=stage_timer, pack=pack)
         
-        # Calculate matches
+        # Only the surviving matches need reasons and impact estimates
         matches = []
-        for recipient in recipients:
-            match_score = calculate_match_score(food_item, recipient)
-            if match_score['overall_score'] > 0.3:  # Minimum threshold
-                matches.append({
-                    'recipient_id': recipient['_id'],
-                    'recipient_name': recipient.get('name', 'Unknown'),
-                    'score': match_score['overall_score'],
-                    'distance_km': match_score['distance_km'],
-                    'urgency_score': match_score['urgency_score'],
-                    'capacity_score': match_score['capacity_score'],
-                    'preference_score': match_score['preference_score'],
-                    'estimated_impact': match_score['estimated_impact'],
-                    'reasons': match_score['reasons']
-                })
-        
-        # Sort by score
-        matches.sort(key=lambda x: x['score'], reverse=True)
+        for match in top_matches:
+            recipient = to_builtins(match['recipient'])
+            matches.append({
+                'recipient_id': recipient['_id'],
+                'recipient_name': recipient.get('name', 'Unknown'),
+                'score': match['score'],
+                'distance_km': round(match['distance_km'], 1),
+                'urgency_score': round(urgency_score, 2),
+                'capacity_score': round(match['capacity'], 2),
+                'preference_score': round(match['preference'], 2),
+                'estimated_impact': calculate_estimated_impact(food_item, recipient),
+                'reasons': generate_match_reasons(match['distance'], urgency_score, match['capacity'], match['preference'])
+            })
         
         # Return top 5 matches
         return jsonify({
-            'matches': matches[:5],
-            'total_potential_recipients': len(matches)
+            'matches': matches,
+            'total_potential_recipients': total_matches
         })
         
+    except BodyDecodeError as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
     except Exception as e:
         logger.error(f"Matching error: {str(e)}")
         return jsonify({"error": "Matching failed"}), 500
 
+def read_match_request():
+    """(food_item, recipients, nearest, pack) for /api/match/food, typed when msgspec is installed"""
+    payload = decode_body(MatchRequest)
+    if payload is None:
+        data = request.json
+        return data.get('food_item'), data.get('recipients'), data.get('nearest'), pack_recipients
+    
+    # Recipients stay typed for scoring; the food item goes back to a dict
+    # for the helpers below
+    return to_builtins(payload.food_item), payload.recipients, payload.nearest, pack_typed_recipients
+
+@app.route('/api/match/batch', methods=['POST'])
+def match_food_batch():
+    """Allocate many food items across recipients without exceeding their capacity"""
+    try:
+        data = request.json
+        food_items = data.get('food_items')
+        recipients = data.get('recipients')
+        
+        if not food_items or (not recipients and not (recipients is None and len(recipient_registry))):
+            return jsonify({"error": "Food items and recipients required"}), 400
+        
+        urgency_scores = np.array([calculate_urgency_score(food_item) for food_item in food_items])
+        options = {
+            'top_k': int(data.get('top_k', MATCH_BATCH_TOP_K)),
+            'time_budget': min(float(data.get('time_budget_ms', MATCH_BATCH_BUDGET_MS)), MATCH_BATCH_BUDGET_MS) / 1000
+        }
+        
+        with stage_timer('batch_assignment'):
+            if recipients is None:
+                result = recipient_registry.assign_batch(food_items, urgency_scores, **options)
+            else:
+                store = RecipientStore.from_recipients(recipients)
+                result = assign_batch(food_items, store, store.rows(), urgency_scores, **options)
+        
+        logger.info(f"Batch match: {len(result['assignments'])}/{len(food_items)} items assigned in {result['elapsed_ms']}ms")
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Batch matching error: {str(e)}")
+        return jsonify({"error": "Batch matching failed"}), 500
+
+@app.route('/api/match/session', methods=['POST'])
+def create_match_session():
+    """Score food items against recipients once so rankings can be refreshed cheaply"""
+    try:
+        data = request.json
+        food_items = data.get('food_items') or ([data['food_item']] if data.get('food_item') else None)
+        recipients = data.get('recipients')
+        
+        if not food_items or (not recipients and not (recipients is None and len(recipient_registry))):
+            return jsonify({"error": "Food items and recipients required"}), 400
+        
+        pairs = len(food_items) * (len(recipient_registry) if recipients is None else len(recipients))
+        if pairs > MATCH_SESSION_MAX_PAIRS:
+            return jsonify({"error": f"Session too large ({pairs} pairs, max {MATCH_SESSION_MAX_PAIRS})"}), 400
+        
+        expiry_epochs = [expiry_epoch(food_item) for food_item in food_items]
+        with stage_timer('session_build'):
+            if recipients is None:
+                session = recipient_registry.ranking_session(food_items, expiry_epochs)
+            else:
+                store = RecipientStore.from_recipients(recipients)
+                session = RankingSession(food_items, store, store.rows(), expiry_epochs)
+        
+        session_id = uuid.uuid4().hex
+        match_sessions.set(session_id, session)
+        
+        return jsonify({
+            'session_id': session_id,
+            'expires_in': MATCH_SESSION_TTL,
+            'rankings': session.rank(time.time(), max(1, int(data.get('limit', 5))))
+        })
+        
+    except Exception as e:
+        logger.error(f"Match session error: {str(e)}")
+        return jsonify({"error": "Session creation failed"}), 500
+
+@app.route('/api/match/session/<session_id>', methods=['GET'])
+def refresh_match_session(session_id):
+    """Re-rank a session with urgency recomputed for the current time"""
+    try:
+        session = match_sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": "Session not found or expired"}), 404
+        
+        with stage_timer('session_rank'):
+            rankings = session.rank(time.time(), max(1, request.args.get('limit', 5, type=int)))
+        
+        return jsonify({'session_id': session_id, 'rankings': rankings})
+        
+    except Exception as e:
+        logger.error(f"Match session refresh error: {str(e)}")
+        return jsonify({"error": "Session refresh failed"}), 500
+
+@app.route('/api/match/session/<session_id>', methods=['DELETE'])
+def delete_match_session(session_id):
+    """Drop a ranking session before it expires"""
+    try:
+        match_sessions.delete(session_id)
+        return jsonify({'deleted': session_id})
+        
+    except Exception as e:
+        logger.error(f"Match session delete error: {str(e)}")
+        return jsonify({"error": "Session delete failed"}), 500
+
+def find_registered_matches(food_item, urgency_score, nearest=None):
+    """Best 5 registered recipients within range of a food item"""
+    if nearest:
+        return recipient_registry.top_matches(food_item, urgency_score, nearest=int(nearest), limit=5, timer=stage_timer)
+    
+    # Recipients beyond the max distance get no distance score, so skip them
+    return recipient_registry.top_matches(food_item, urgency_score, radius_km=MAX_DISTANCE_KM, limit=5, timer=stage_timer)
+
 def calculate_match_score(food_item, recipient):
     """Calculate compatibility score between food and recipient"""
     
@@ -317,23 +921,8 @@ def calculate_match_score(food_item, recipient):
     }
 
 def calculate_distance(coord1, coord2):
-    """Calculate distance between two coordinates using Haversine formula"""
-    from math import radians, sin, cos, sqrt, atan2
-    
-    lat1, lon1 = radians(coord1[1]), radians(coord1[0])
-    lat2, lon2 = radians(coord2[1]), radians(coord2[0])
-    
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    
-    # Earth radius in kilometers
-    r = 6371
-    distance = r * c
-    
-    return distance
+    """Calculate distance between two [lng, lat] coordinates using Haversine formula"""
+    return point_distance_km(coord1[0], coord1[1], coord2[0], coord2[1])
 
 def calculate_urgency_score(food_item):
     """Calculate urgency based on expiry time"""
@@ -353,6 +942,17 @@ def calculate_urgency_score(food_item):
     except:
         return 0.5  # Default
 
+def expiry_epoch(food_item):
+    """Expiry in epoch seconds for vectorized urgency, NaN (urgency 0.5) when it can't be parsed
+    
+    Unlike calculate_urgency_score, UTC and offset timestamps such as the
+    Node server's toISOString() are used; naive ones are local time.
+    """
+    try:
+        return datetime.fromisoformat(food_item['expiresAt'].replace('Z', '+00:00')).timestamp()
+    except:
+        return float('nan')
+
 def calculate_capacity_score(food_item, recipient):
     """Calculate if recipient can handle the food quantity"""
     food_quantity = food_item['quantity']['value']
@@ -435,6 +1035,49 @@ def generate_match_reasons(distance_score, urgency_score, capacity_score, prefer
     
     return reasons
 
+# ============================================================================
+# RECIPIENT REGISTRY
+# ============================================================================
+
+@app.route('/api/recipients', methods=['GET'])
+def recipient_registry_stats():
+    return jsonify({'total_recipients': len(recipient_registry)})
+
+@app.route('/api/recipients', methods=['POST'])
+def register_recipients():
+    """Add or update recipients used when /api/match/food gets no list"""
+    try:
+        data = request.json
+        recipients = data.get('recipients', [])
+        
+        if not recipients:
+            return jsonify({"error": "Recipients required"}), 400
+        
+        registered = recipient_registry.upsert(recipients)
+        
+        return jsonify({
+            'registered': registered,
+            'total_recipients': len(recipient_registry)
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Recipient registration error: {str(e)}")
+        return jsonify({"error": "Registration failed"}), 500
+
+@app.route('/api/recipients/<recipient_id>', methods=['DELETE'])
+def unregister_recipient(recipient_id):
+    removed = recipient_registry.remove([recipient_id])
+    
+    if not removed:
+        return jsonify({"error": "Recipient not found"}), 404
+    
+    return jsonify({
+        'removed': removed,
+        'total_recipients': len(recipient_registry)
+    })
+
 # ============================================================================
 # HUGGING FACE INTEGRATION
 # ============================================================================
@@ -449,93 +1092,134 @@ def analyze_food_description():
         if not description:
             return jsonify({"error": "Description required"}), 400
         
-        # Use Hugging Face for sentiment analysis
-        sentiment_result = query_hugging_face_sentiment(description)
+        # Repeated descriptions are served from the analysis cache
+        analysis = analysis_cache.get(description)
+        if analysis is None:
+            # Use Hugging Face for sentiment analysis
+            sentiment_result = query_hugging_face_sentiment(description)
+            analysis = build_description_analysis(description, sentiment_result)
+            cache_description_analysis(description, analysis)
         
-        # Extract food categories using simple keyword matching
-        categories = extract_food_categories(description)
+        return jsonify(analysis)
         
-        # Estimate freshness from description
-        freshness = estimate_freshness(description)
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}")
+        return jsonify({"error": "Analysis failed"}), 500
+
+@app.route('/api/analyze/sentiment/batch', methods=['POST'])
+def analyze_food_descriptions_batch():
+    """Analyze many food descriptions with batched sentiment calls"""
+    try:
+        data = request.json
+        descriptions = data.get('descriptions', [])
+        
+        if not descriptions:
+            return jsonify({"error": "Descriptions required"}), 400
+        
+        results = [
+            analysis_cache.get(description) if description else {"error": "Description required"}
+            for description in descriptions
+        ]
+        
+        # Send each distinct uncached description to Hugging Face, in batches
+        pending = {}
+        for index, result in enumerate(results):
+            if result is None:
+                pending.setdefault(content_key(descriptions[index]), []).append(index)
+        
+        groups = list(pending.values())
+        for start in range(0, len(groups), SENTIMENT_BATCH_SIZE):
+            batch = groups[start:start + SENTIMENT_BATCH_SIZE]
+            sentiments = query_hugging_face_sentiment_batch([descriptions[indices[0]] for indices in batch])
+            for indices, sentiment_result in zip(batch, sentiments):
+                analysis = build_description_analysis(descriptions[indices[0]], sentiment_result)
+                cache_description_analysis(descriptions[indices[0]], analysis)
+                for index in indices:
+                    results[index] = analysis
         
         return jsonify({
-            'sentiment': sentiment_result,
-            'categories': categories,
-            'freshness': freshness,
-            'quality_score': calculate_quality_score(description)
+            'results': results,
+            'total_processed': len(results)
         })
         
     except Exception as e:
-        logger.error(f"Analysis error: {str(e)}")
-        return jsonify({"error": "Analysis failed"}), 500
+        logger.error(f"Batch analysis error: {str(e)}")
+        return jsonify({"error": "Batch analysis failed"}), 500
+
+def build_description_analysis(description, sentiment_result):
+    """Combine sentiment with keyword-based insights for one description"""
+    # Categories, freshness and quality come from one keyword scan
+    with stage_timer('text_analysis'):
+        insights = analyze_text(description)
+    
+    return {
+        'sentiment': sentiment_result,
+        'categories': insights['categories'],
+        'freshness': insights['freshness'],
+        'quality_score': insights['quality_score']
+    }
+
+def cache_description_analysis(description, analysis):
+    """Cache an analysis unless its sentiment is only the fallback default"""
+    if analysis['sentiment'] != DEFAULT_SENTIMENT:
+        analysis_cache.set(description, analysis)
+
+@app.route('/api/analyze/cache/stats', methods=['GET'])
+def analysis_cache_stats():
+    return jsonify(analysis_cache.stats())
 
 def query_hugging_face_sentiment(text):
-    """Query Hugging Face sentiment analysis API"""
+    """Query Hugging Face sentiment, batched with concurrent callers when enabled"""
+    if sentiment_batcher:
+        return sentiment_batcher.submit(text)
+    return query_hugging_face_sentiment_batch([text])[0]
+
+def query_hugging_face_sentiment_batch(texts):
+    """Query Hugging Face sentiment analysis API for several texts in one call"""
     try:
-        API_URL = "https://api-inference.huggingface.co/models/cardiffnlp/twitter-roberta-base-sentiment-latest"
-        response = requests.post(API_URL, headers=HF_HEADERS, json={"inputs": text}, timeout=10)
+        with stage_timer('hf_sentiment'):
+            response = hf_client.post(HF_SENTIMENT_URL, headers=HF_HEADERS, json={"inputs": texts})
         
         if response.status_code == 200:
             result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                return result[0]
+            if isinstance(result, list) and len(result) == len(texts):
+                return result
+    except CircuitOpenError:
+        pass
     except Exception as e:
         logger.error(f"HuggingFace API error: {str(e)}")
     
-    return [{"label": "NEUTRAL", "score": 0.5}]  # Default
+    return [list(DEFAULT_SENTIMENT) for _ in texts]  # Default
+
+# Analysis results keyed by normalized description; ANALYSIS_CACHE_PATH adds
+# a SQLite copy shared across workers and restarts
+analysis_cache = AnalysisCache(
+    max_entries=int(os.getenv('ANALYSIS_CACHE_SIZE', 4096)),
+    ttl=float(os.getenv('ANALYSIS_CACHE_TTL', 86400)),
+    path=os.getenv('ANALYSIS_CACHE_PATH')
+)
+
+# Concurrent single-description requests are coalesced into one Hugging Face
+# call; set SENTIMENT_BATCH_WINDOW_MS=0 to send each one on its own
+SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', 32))
+SENTIMENT_BATCH_WINDOW_MS = float(os.getenv('SENTIMENT_BATCH_WINDOW_MS', 5))
+sentiment_batcher = MicroBatcher(
+    query_hugging_face_sentiment_batch,
+    max_batch_size=SENTIMENT_BATCH_SIZE,
+    max_wait=SENTIMENT_BATCH_WINDOW_MS / 1000
+) if SENTIMENT_BATCH_WINDOW_MS > 0 else None
 
 def extract_food_categories(description):
     """Extract food categories from description using keywords"""
-    categories = []
-    
-    category_keywords = {
-        'meals': ['meal', 'dinner', 'lunch', 'breakfast', 'dish', 'prepared'],
-        'bakery': ['bread', 'cake', 'pastry', 'cookie', 'muffin', 'croissant'],
-        'produce': ['fruit', 'vegetable', 'apple', 'banana', 'carrot', 'lettuce', 'tomato'],
-        'dairy': ['milk', 'cheese', 'yogurt', 'butter', 'cream'],
-        'beverages': ['juice', 'soda', 'water', 'coffee', 'tea'],
-        'snacks': ['chips', 'crackers', 'nuts', 'candy']
-    }
-    
-    description_lower = description.lower()
-    
-    for category, keywords in category_keywords.items():
-        if any(keyword in description_lower for keyword in keywords):
-            categories.append(category)
-    
-    return categories if categories else ['other']
+    return categories_from_keywords(find_keywords(description))
 
 def estimate_freshness(description):
     """Estimate food freshness from description"""
-    description_lower = description.lower()
-    
-    fresh_indicators = ['fresh', 'new', 'just made', 'today', 'crisp']
-    old_indicators = ['day old', 'yesterday', 'leftover', 'excess']
-    
-    fresh_score = sum(1 for indicator in fresh_indicators if indicator in description_lower)
-    old_score = sum(1 for indicator in old_indicators if indicator in description_lower)
-    
-    if fresh_score > old_score:
-        return 'high'
-    elif old_score > fresh_score:
-        return 'medium'
-    else:
-        return 'unknown'
+    return freshness_from_keywords(find_keywords(description))
 
 def calculate_quality_score(description):
     """Calculate overall quality score based on description"""
-    positive_words = ['fresh', 'delicious', 'quality', 'excellent', 'perfect', 'good']
-    negative_words = ['old', 'stale', 'expired', 'bad', 'poor']
-    
-    description_lower = description.lower()
-    
-    positive_count = sum(1 for word in positive_words if word in description_lower)
-    negative_count = sum(1 for word in negative_words if word in description_lower)
-    
-    base_score = 0.7
-    score = base_score + (positive_count * 0.1) - (negative_count * 0.2)
-    
-    return max(0, min(1, score))
+    return quality_from_keywords(find_keywords(description))
 
 # ============================================================================
 # BATCH PROCESSING FOR PREDICTIONS
@@ -544,14 +1228,16 @@ def calculate_quality_score(description):
 @app.route('/api/batch/predict-demand', methods=['POST'])
 def batch_predict_demand():
     """Batch process demand predictions for multiple locations"""
+    if request.mimetype == NDJSON_MIMETYPE:
+        return stream_predict_demand()
+    
     try:
         data = request.json
         locations = data.get('locations', [])
         
         predictions = []
-        for location in locations:
-            prediction = predict_area_demand(location)
-            predictions.append(prediction)
+        for start in range(0, len(locations), DEMAND_CHUNK_SIZE):
+            predictions.extend(predict_area_demand_chunk(locations[start:start + DEMAND_CHUNK_SIZE]))
         
         return jsonify({
             'predictions': predictions,
@@ -562,6 +1248,82 @@ def batch_predict_demand():
         logger.error(f"Batch prediction error: {str(e)}")
         return jsonify({"error": "Batch processing failed"}), 500
 
+def stream_predict_demand():
+    """NDJSON in, NDJSON out: one location per line, memory bounded by chunk size"""
+    def read_lines():
+        # Read in blocks: line iteration on the raw request stream reads
+        # one byte at a time
+        remainder = b''
+        while True:
+            block = request.stream.read(NDJSON_READ_SIZE)
+            if not block:
+                break
+            lines = (remainder + block).split(b'\n')
+            remainder = lines.pop()
+            yield from lines
+        yield remainder
+    
+    def read_chunks():
+        chunk = []
+        for line in read_lines():
+            if line.strip():
+                chunk.append(line)
+            if len(chunk) >= DEMAND_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def generate():
+        processed = 0
+        try:
+            for count, body in map(predict_area_demand_ndjson, read_chunks()):
+                processed += count
+                yield body
+        except Exception as e:
+            logger.error(f"Streaming batch prediction error after {processed} locations: {str(e)}")
+            yield encode_json({"error": "Batch processing failed", "processed": processed}) + b'\n'
+    
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+def predict_area_demand_ndjson(lines):
+    """Decode NDJSON location lines, predict their demand and encode the results as NDJSON"""
+    predictions = predict_area_demand_chunk([decode_json(line) for line in lines])
+    return len(predictions), b''.join(encode_json(prediction) + b'\n' for prediction in predictions)
+
+def predict_area_demand_chunk(locations):
+    """Vectorized predict_area_demand over a list of locations"""
+    def column(name, default):
+        return np.array([location.get(name, default) for location in locations], dtype=float)
+    
+    population_density = column('population_density', 100)
+    poverty_rate = column('poverty_rate', 0.1)
+    food_access_score = column('food_access_score', 0.5)
+    
+    # Same operation order as predict_area_demand, so results are identical
+    demand_multiplier = (
+        (population_density / 1000) * 0.4 +
+        (poverty_rate * 10) * 0.4 +
+        (1 - food_access_score) * 0.2
+    )
+    predicted_demand = 50 * demand_multiplier
+    
+    predictions = []
+    for location, demand in zip(locations, predicted_demand.tolist()):
+        predictions.append({
+            'location': location.get('name', 'Unknown'),
+            'coordinates': location.get('coordinates'),
+            'predicted_daily_demand_kg': round(demand, 1),
+            'demand_level': 'high' if demand > 75 else 'medium' if demand > 25 else 'low',
+            'factors': {
+                'population_density': location.get('population_density', 100),
+                'poverty_rate': location.get('poverty_rate', 0.1),
+                'food_access_score': location.get('food_access_score', 0.5)
+            }
+        })
+    
+    return predictions
+
 def predict_area_demand(location):
     """Predict food demand for a specific area"""
     # Simple demand prediction based on location characteristics
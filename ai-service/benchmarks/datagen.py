@@ -0,0 +1,97 @@
+"""Synthetic food items, recipients, descriptions and demand locations"""
+import random
+from datetime import datetime, timedelta
+
+DIETARY_TAGS = ['vegetarian', 'vegan', 'halal', 'kosher', 'gluten_free', 'nut_free', 'dairy_free']
+CATEGORIES = ['meals', 'bakery', 'produce', 'dairy', 'beverages', 'snacks', 'other']
+DESCRIPTION_WORDS = [
+    'fresh', 'bread', 'day', 'old', 'pastries', 'cookies', 'milk', 'cheese', 'yogurt', 'leftover',
+    'rice', 'dinner', 'meals', 'prepared', 'today', 'apples', 'bananas', 'juice', 'coffee', 'excess',
+    'delicious', 'quality', 'stale', 'from', 'our', 'kitchen', 'bakery', 'boxes', 'trays', 'of'
+]
+
+# Nairobi; recipients are spread around it so some fall outside 50 km
+CENTER_LNG, CENTER_LAT = 36.82, -1.29
+
+
+def make_food_item(seed=0, hours_to_expiry=5):
+    """Food item in the schema /api/match/food receives from the server"""
+    rng = random.Random(seed)
+    return {
+        '_id': f'food-{seed}',
+        'category': rng.choice(CATEGORIES),
+        'quantity': {'value': rng.choice([2, 8, 15, 40]), 'unit': 'kg'},
+        'expiresAt': (datetime.now() + timedelta(hours=hours_to_expiry)).isoformat(),
+        'location': {'type': 'Point', 'coordinates': [CENTER_LNG, CENTER_LAT]},
+        'dietaryInfo': rng.sample(DIETARY_TAGS, rng.randint(0, 3)),
+        'estimatedValue': round(rng.uniform(5, 150), 2)
+    }
+
+
+def make_recipients(count, seed=1, spread_deg=1.0):
+    """Recipients in the nested schema the server sends"""
+    rng = random.Random(seed)
+    return [{
+        '_id': f'recipient-{i}',
+        'name': f'Organization {i}',
+        'profile': {
+            'location': {
+                'type': 'Point',
+                'coordinates': [
+                    CENTER_LNG + rng.uniform(-spread_deg, spread_deg),
+                    CENTER_LAT + rng.uniform(-spread_deg, spread_deg)
+                ]
+            },
+            'servingCapacity': rng.choice([10, 25, 50, 100, 250]),
+            'dietaryRestrictions': rng.sample(DIETARY_TAGS, rng.randint(0, 3)),
+            'preferredCategories': rng.sample(CATEGORIES, rng.randint(0, 3))
+        }
+    } for i in range(count)]
+
+
+def make_smart_food_item(seed=0, hours_to_expiry=5):
+    """Food item in the flat schema SmartMatcher uses"""
+    rng = random.Random(seed)
+    return {
+        'lat': CENTER_LAT,
+        'lng': CENTER_LNG,
+        'expires_at': (datetime.now() + timedelta(hours=hours_to_expiry)).isoformat(),
+        'quantity': rng.choice([2, 8, 15, 40]),
+        'category': rng.choice(CATEGORIES),
+        'tags': rng.sample(DIETARY_TAGS, rng.randint(0, 3)),
+        'estimated_value': round(rng.uniform(5, 150), 2)
+    }
+
+
+def make_smart_recipients(count, seed=1, spread_deg=1.0):
+    """Recipients in the flat schema SmartMatcher uses"""
+    rng = random.Random(seed)
+    return [{
+        '_id': f'recipient-{i}',
+        'name': f'Organization {i}',
+        'lat': CENTER_LAT + rng.uniform(-spread_deg, spread_deg),
+        'lng': CENTER_LNG + rng.uniform(-spread_deg, spread_deg),
+        'quantity_needed': rng.choice([5, 10, 20, 50]),
+        'dietary_restrictions': rng.sample(DIETARY_TAGS, rng.randint(0, 3)),
+        'preferred_food_types': rng.sample(CATEGORIES, rng.randint(0, 3)),
+        'people_served': rng.choice([10, 50, 200])
+    } for i in range(count)]
+
+
+def make_descriptions(count, seed=2, words=(5, 40)):
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(*words)))
+        for _ in range(count)
+    ]
+
+
+def make_demand_locations(count, seed=3):
+    rng = random.Random(seed)
+    return [{
+        'name': f'cell-{i}',
+        'coordinates': [CENTER_LNG + rng.uniform(-1, 1), CENTER_LAT + rng.uniform(-1, 1)],
+        'population_density': round(rng.uniform(50, 15000), 1),
+        'poverty_rate': round(rng.uniform(0, 0.6), 3),
+        'food_access_score': round(rng.random(), 3)
+    } for i in range(count)]
@@ -0,0 +1,348 @@
+"""Benchmarks for the AI service hot paths
+
+Usage (from ai-service/):
+    python -m benchmarks.run [--sizes 1000,10000] [--filter match] [--output results.json]
+    python -m benchmarks.run --compare baseline.json [--tolerance 1.25]
+
+Upstream APIs are replaced by local stubs, so results measure only this
+service. Results are written as JSON; --compare exits non-zero when any
+benchmark is slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Keep the service away from real upstreams before it is imported
+os.environ.pop('OPENWEATHER_API_KEY', None)
+os.environ['SENTIMENT_BATCH_WINDOW_MS'] = '0'
+
+import numpy as np
+
+import app
+from benchmarks import datagen
+from models.geo import GEOPY_AVAILABLE, distance_km
+from models.matching_algorithm import SmartMatcher
+from models.match_engine import store_top_matches, stream_top_matches
+from models.recipient_store import RecipientStore
+from models.text_analysis import (
+    CATEGORY_KEYWORDS, FRESH_INDICATORS, NEGATIVE_WORDS, OLD_INDICATORS, POSITIVE_WORDS, analyze_text
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class StubClient:
+    """Answers like the Hugging Face inference API without any network"""
+
+    def post(self, url, json=None, **kwargs):
+        inputs = json['inputs']
+        return StubResponse([[{'label': 'positive', 'score': 0.8}] for _ in inputs])
+
+
+def stub_upstreams():
+    app.hf_client = StubClient()
+    app.weather_cache.fetch = lambda lat, lng: {
+        'temperature': 20, 'condition_code': 800, 'condition': 'clear', 'rain': 0, 'impact': 'low_surplus'
+    }
+
+
+# Each benchmark maps a size to a zero-argument callable that runs once
+
+def bench_calculate_match_score(size):
+    food_item = datagen.make_food_item()
+    recipients = datagen.make_recipients(size)
+    return lambda: [app.calculate_match_score(food_item, recipient) for recipient in recipients]
+
+
+def bench_match_route(size):
+    client = app.app.test_client()
+    body = json.dumps({'food_item': datagen.make_food_item(), 'recipients': datagen.make_recipients(size)})
+    return lambda: client.post('/api/match/food', data=body, content_type='application/json')
+
+
+def bench_stream_top_matches(size):
+    food_item = datagen.make_food_item()
+    recipients = datagen.make_recipients(size)
+    urgency = app.calculate_urgency_score(food_item)
+    return lambda: stream_top_matches(food_item, recipients, urgency)
+
+
+def bench_store_top_matches(size):
+    food_item = datagen.make_food_item()
+    store = RecipientStore.from_recipients(datagen.make_recipients(size))
+    rows = store.rows()
+    urgency = app.calculate_urgency_score(food_item)
+    return lambda: store_top_matches(food_item, store, rows, urgency)
+
+
+def bench_match_batch_route(size):
+    # size food items against a fixed pool of 1,000 recipients
+    client = app.app.test_client()
+    food_items = [datagen.make_food_item(seed=i) for i in range(size)]
+    body = json.dumps({'food_items': food_items, 'recipients': datagen.make_recipients(1000)})
+    return lambda: client.post('/api/match/batch', data=body, content_type='application/json')
+
+
+def bench_smart_matcher(size):
+    matcher = SmartMatcher()
+    food_item = datagen.make_smart_food_item()
+    recipients = datagen.make_smart_recipients(size)
+    return lambda: matcher.find_best_matches(food_item, recipients)
+
+
+def bench_calculate_distance(size):
+    origin = [datagen.CENTER_LNG, datagen.CENTER_LAT]
+    points = [recipient['profile']['location']['coordinates'] for recipient in datagen.make_recipients(size)]
+    return lambda: [app.calculate_distance(origin, point) for point in points]
+
+
+def bench_geopy_geodesic(size):
+    from geopy.distance import geodesic
+
+    origin = (datagen.CENTER_LAT, datagen.CENTER_LNG)
+    points = [(lat, lng) for lng, lat in
+              (recipient['profile']['location']['coordinates'] for recipient in datagen.make_recipients(size))]
+    return lambda: [geodesic(origin, point).kilometers for point in points]
+
+
+def bench_geo_distance(mode):
+    def bench(size):
+        points = [recipient['profile']['location']['coordinates'] for recipient in datagen.make_recipients(size)]
+        lngs = np.array([point[0] for point in points])
+        lats = np.array([point[1] for point in points])
+        return lambda: distance_km(datagen.CENTER_LNG, datagen.CENTER_LAT, lngs, lats, mode=mode)
+    return bench
+
+
+def bench_text_analysis(size):
+    descriptions = datagen.make_descriptions(size)
+    return lambda: [analyze_text(description) for description in descriptions]
+
+
+def bench_text_analysis_long(size):
+    descriptions = datagen.make_descriptions(size, words=(200, 400))
+    return lambda: [analyze_text(description) for description in descriptions]
+
+
+def substring_scan(description):
+    """The original keyword helpers: one substring scan per keyword list"""
+    description_lower = description.lower()
+    categories = [
+        category for category, keywords in CATEGORY_KEYWORDS.items()
+        if any(keyword in description_lower for keyword in keywords)
+    ]
+    fresh_score = sum(1 for indicator in FRESH_INDICATORS if indicator in description_lower)
+    old_score = sum(1 for indicator in OLD_INDICATORS if indicator in description_lower)
+    positive_count = sum(1 for word in POSITIVE_WORDS if word in description_lower)
+    negative_count = sum(1 for word in NEGATIVE_WORDS if word in description_lower)
+    return categories, fresh_score - old_score, positive_count - negative_count
+
+
+def bench_substring_scan(words):
+    """Reference timing for analyze_text at the same description lengths"""
+    def bench(size):
+        descriptions = datagen.make_descriptions(size, words=words)
+        return lambda: [substring_scan(description) for description in descriptions]
+    return bench
+
+
+def bench_text_helpers(size):
+    descriptions = datagen.make_descriptions(size)
+    return lambda: [
+        (app.extract_food_categories(d), app.estimate_freshness(d), app.calculate_quality_score(d))
+        for d in descriptions
+    ]
+
+
+def bench_sentiment_batch_route(size):
+    client = app.app.test_client()
+    body = json.dumps({'descriptions': datagen.make_descriptions(size, seed=size)})
+
+    def run():
+        app.analysis_cache = type(app.analysis_cache)()  # start cold every round
+        client.post('/api/analyze/sentiment/batch', data=body, content_type='application/json')
+    return run
+
+
+def bench_predict_demand_route(size):
+    client = app.app.test_client()
+    body = json.dumps({'locations': datagen.make_demand_locations(size)})
+    return lambda: client.post('/api/batch/predict-demand', data=body, content_type='application/json')
+
+
+def bench_predict_demand_ndjson(size):
+    client = app.app.test_client()
+    body = ''.join(json.dumps(location) + '\n' for location in datagen.make_demand_locations(size))
+    return lambda: client.post('/api/batch/predict-demand', data=body, content_type='application/x-ndjson').get_data()
+
+
+def bench_predict_surplus_batch(size):
+    client = app.app.test_client()
+    businesses = [{
+        'business_id': i, 'business_type': 'bakery', 'historical_avg_surplus': 10 + i % 30,
+        'lat': datagen.CENTER_LAT + (i % 50) * 0.01, 'lng': datagen.CENTER_LNG
+    } for i in range(size)]
+    body = json.dumps({'businesses': businesses})
+    return lambda: client.post('/api/predict/surplus/batch', data=body, content_type='application/json')
+
+
+def bench_surplus_horizon(size):
+    """Feature matrix and predictions for `size` hourly slots of one business"""
+    start = datetime(2025, 1, 1)
+    moments = [start + timedelta(hours=hour) for hour in range(size)]
+    slots = np.arange(size // 3 + 1, dtype=float)
+    forecast = {
+        'times': start.timestamp() + 10800 * slots,
+        'temperature': 15 + slots % 20,
+        'condition_code': np.full(slots.size, 800.0),
+        'rain': (slots % 4 == 0).astype(float)
+    }
+    data = {'business_type': 'restaurant', 'historical_avg_surplus': 18}
+    return lambda: app.predict_surplus_from_columns(app.build_horizon_columns(data, moments, forecast))
+
+
+BENCHMARKS = {
+    'calculate_match_score': bench_calculate_match_score,
+    'match_food_with_recipients': bench_match_route,
+    'stream_top_matches': bench_stream_top_matches,
+    'store_top_matches': bench_store_top_matches,
+    'match_batch_route': bench_match_batch_route,
+    'smart_matcher_find_best_matches': bench_smart_matcher,
+    'calculate_distance': bench_calculate_distance,
+    'geopy_geodesic': bench_geopy_geodesic,
+    'geo_haversine_vectorized': bench_geo_distance('haversine'),
+    'geo_fast_vectorized': bench_geo_distance('fast'),
+    'geo_exact': bench_geo_distance('exact'),
+    'analyze_text': bench_text_analysis,
+    'analyze_text_long': bench_text_analysis_long,
+    'text_substring_scan': bench_substring_scan((5, 40)),
+    'text_substring_scan_long': bench_substring_scan((200, 400)),
+    'text_analysis_helpers': bench_text_helpers,
+    'sentiment_batch_route': bench_sentiment_batch_route,
+    'batch_predict_demand': bench_predict_demand_route,
+    'batch_predict_demand_ndjson': bench_predict_demand_ndjson,
+    'predict_surplus_batch': bench_predict_surplus_batch,
+    'surplus_horizon': bench_surplus_horizon,
+}
+
+# Need the optional geopy package; skipped when it is not installed
+GEOPY_BENCHMARKS = ('geopy_geodesic', 'geo_exact')
+
+
+def time_callable(function, rounds, budget):
+    """Time up to `rounds` runs, stopping early once `budget` seconds are spent"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < rounds:
+        begin = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - begin)
+        if time.perf_counter() - started > budget:
+            break
+    return timings
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def run(names, sizes, rounds, budget):
+    results = []
+    for name in names:
+        for size in sizes:
+            function = BENCHMARKS[name](size)
+            timings = time_callable(function, rounds, budget)
+            result = {
+                'name': name,
+                'size': size,
+                'rounds': len(timings),
+                'min_s': min(timings),
+                'median_s': statistics.median(timings),
+                'mean_s': statistics.mean(timings),
+                'per_item_us': min(timings) / size * 1e6
+            }
+            results.append(result)
+            print(f"{name:34} {size:>9,}  min {result['min_s'] * 1000:10.2f} ms  "
+                  f"median {result['median_s'] * 1000:10.2f} ms  ({result['per_item_us']:.2f} µs/item)")
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Print the change against a baseline run; return the regressed benchmarks"""
+    with open(baseline_path) as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['name'], result['size']))
+        if previous is None:
+            continue
+        ratio = result['min_s'] / previous['min_s']
+        flag = 'REGRESSION' if ratio > tolerance else ''
+        print(f"{result['name']:34} {result['size']:>9,}  {ratio:6.2f}x baseline {flag}")
+        if ratio > tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated input sizes (e.g. 1000,10000,1000000)')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--rounds', type=int, default=5, help='maximum timed runs per benchmark')
+    parser.add_argument('--budget', type=float, default=10.0, help='seconds per benchmark before stopping early')
+    parser.add_argument('--output', default=None, help='where to write JSON results')
+    parser.add_argument('--compare', default=None, help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    stub_upstreams()
+    names = [name for name in BENCHMARKS if args.filter in name]
+    skipped = [name for name in names if name in GEOPY_BENCHMARKS and not GEOPY_AVAILABLE]
+    if skipped:
+        print(f"Skipping {', '.join(skipped)}: geopy is not installed")
+        names = [name for name in names if name not in skipped]
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run(names, sizes, args.rounds, args.budget)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine()
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# Gunicorn settings for the AI service (loaded automatically from ai-service/)
+#
+# GUNICORN_WORKER_CLASS=gevent serves each worker's requests cooperatively:
+# while one request waits on OpenWeatherMap or Hugging Face, the worker keeps
+# serving others instead of blocking for up to the upstream timeout.
+#
+# GUNICORN_PRELOAD=true imports the app (and loads the surplus model) once
+# in the master; forked workers then share those pages copy-on-write
+# instead of each paying the import time and memory themselves.
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5001)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+if preload_app and worker_class == 'gevent':
+    # Workers patch the stdlib only after fork; a preloaded app would already
+    # hold unpatched locks, so patch in the master before it is imported
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def pre_fork(server, worker):
+    # Keep the preloaded objects out of garbage collection so workers don't
+    # copy the pages they live on when the collector touches them
+    if preload_app:
+        gc.freeze()
+
+
+# Prometheus multiprocess mode: with PROMETHEUS_MULTIPROC_DIR set, workers
+# write metrics to that directory and /api/metrics aggregates them
+def on_starting(server):
+    metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,177 @@
+import time
+
+import numpy as np
+
+from models.geo import haversine_km
+from models.match_engine import (
+    MATCH_THRESHOLD, MATCH_WEIGHTS, MAX_DISTANCE_KM, capacity_scores, preference_scores
+)
+from models.recipient_store import popcount
+
+# A recipient may take up to 1.5x its serving capacity, the top of the
+# capacity score's best-fit range
+CAPACITY_ALLOWANCE = 1.5
+# Items are scored in chunks so the items x recipients matrix stays this size
+MAX_MATRIX_CELLS = 2_000_000
+
+
+def pack_food_items(food_items, store):
+    """Pack food item coordinates, quantities and preference masks into arrays"""
+    count = len(food_items)
+    lngs = np.empty(count)
+    lats = np.empty(count)
+    quantities = np.empty(count)
+    restriction_masks = np.zeros((count, store.restriction_masks.shape[1]), dtype=np.uint64)
+    category_masks = np.zeros((count, store.category_masks.shape[1]), dtype=np.uint64)
+
+    for i, food_item in enumerate(food_items):
+        coordinates = food_item['location']['coordinates']
+        lngs[i] = coordinates[0]
+        lats[i] = coordinates[1]
+        quantities[i] = food_item['quantity']['value']
+        restriction_masks[i], category_masks[i] = store.food_masks(food_item)
+
+    return {
+        'lngs': lngs,
+        'lats': lats,
+        'quantities': quantities,
+        'restriction_masks': restriction_masks,
+        'category_masks': category_masks
+    }
+
+
+def score_components(items, store, rows):
+    """(distance, capacity, preference) score matrices for packed items against store rows"""
+    distances = haversine_km(items['lngs'][:, None], items['lats'][:, None], store.lngs[rows], store.lats[rows])
+    distance = np.maximum(0, 1 - (distances / MAX_DISTANCE_KM))
+    capacity = capacity_scores(items['quantities'][:, None], store.capacities[rows])
+
+    restriction_matches = popcount(
+        store.restriction_masks[rows][None, :, :] & items['restriction_masks'][:, None, :]
+    ).sum(axis=2, dtype=np.int64)
+    category_matches = (store.category_masks[rows][None, :, :] & items['category_masks'][:, None, :]).any(axis=2)
+    preference = preference_scores(restriction_matches, category_matches)
+
+    return distance, capacity, preference
+
+
+def score_matrix(items, store, rows, urgency_scores):
+    """Overall match scores for packed items (one row each) against store rows"""
+    distance, capacity, preference = score_components(items, store, rows)
+    return (
+        distance * MATCH_WEIGHTS['distance'] +
+        urgency_scores[:, None] * MATCH_WEIGHTS['urgency'] +
+        capacity * MATCH_WEIGHTS['capacity'] +
+        preference * MATCH_WEIGHTS['preference']
+    )
+
+
+def _slice(items, start, stop):
+    return {key: values[start:stop] for key, values in items.items()}
+
+
+def assign_batch(food_items, store, rows, urgency_scores, top_k=10, threshold=MATCH_THRESHOLD,
+                 time_budget=None, clock=time.perf_counter):
+    """Assign each food item to at most one recipient without overfilling anyone
+
+    Every item keeps its top_k recipients; candidates are then taken greedily,
+    best score first, while the recipient's remaining allowance
+    (servingCapacity x CAPACITY_ALLOWANCE) still covers the item's quantity.
+    Items whose candidates all filled up are placed in a second pass over
+    every recipient that still has room. Work stops at the time budget
+    (seconds) and any items not yet placed are reported as unassigned.
+    """
+    started = clock()
+    deadline = None if time_budget is None else started + time_budget
+    out_of_time = lambda: deadline is not None and clock() > deadline
+
+    rows = np.asarray(rows, dtype=np.intp)
+    urgency_scores = np.asarray(urgency_scores, dtype=float)
+    items = pack_food_items(food_items, store)
+    quantities = items['quantities'].tolist()
+    remaining = (CAPACITY_ALLOWANCE * np.maximum(store.capacities[rows], 0)).tolist()
+    item_count = len(food_items)
+    chunk_size = max(1, MAX_MATRIX_CELLS // max(1, len(rows)))
+    k = min(top_k, len(rows))
+
+    # Pass 1: top_k candidates per item, scored a chunk of items at a time
+    candidate_items, candidate_columns, candidate_scores = [], [], []
+    scored = 0 if k else item_count
+    while scored < item_count and not out_of_time():
+        stop = min(item_count, scored + chunk_size)
+        scores = score_matrix(_slice(items, scored, stop), store, rows, urgency_scores[scored:stop])
+        columns = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, columns, axis=1)
+        keep = top_scores > threshold
+        candidate_items.append(np.nonzero(keep)[0] + scored)
+        candidate_columns.append(columns[keep])
+        candidate_scores.append(top_scores[keep])
+        scored = stop
+
+    assigned = [None] * item_count
+    has_candidates = np.zeros(item_count, dtype=bool)
+    if candidate_items:
+        item_ids = np.concatenate(candidate_items)
+        columns = np.concatenate(candidate_columns)
+        scores = np.concatenate(candidate_scores)
+        has_candidates[item_ids] = True
+
+        # Best score first; ties go to the earlier item, then the earlier recipient
+        order = np.lexsort((columns, item_ids, -scores))
+        for item, column, score in zip(item_ids[order].tolist(), columns[order].tolist(), scores[order].tolist()):
+            if assigned[item] is None and remaining[column] >= quantities[item]:
+                assigned[item] = (column, score)
+                remaining[column] -= quantities[item]
+
+    # Pass 2: items that lost all their candidates to capacity look at
+    # every recipient that still has room
+    overflow = [item for item in range(scored) if assigned[item] is None and has_candidates[item]]
+    reached = set()
+    for start in range(0, len(overflow), chunk_size):
+        if out_of_time():
+            break
+        batch = np.array(overflow[start:start + chunk_size])
+        scores = score_matrix({key: values[batch] for key, values in items.items()},
+                              store, rows, urgency_scores[batch])
+        room = np.array(remaining)
+        for item, item_scores in zip(batch.tolist(), scores):
+            item_scores = np.where(room >= quantities[item], item_scores, -np.inf)
+            column = int(np.argmax(item_scores))
+            if item_scores[column] > threshold:
+                assigned[item] = (column, float(item_scores[column]))
+                remaining[column] -= quantities[item]
+                room[column] = remaining[column]
+        reached.update(batch.tolist())
+
+    assignments, unassigned = [], []
+    for item, food_item in enumerate(food_items):
+        if assigned[item] is not None:
+            column, score = assigned[item]
+            row = rows[column]
+            record = store.records[row]
+            assignments.append({
+                'item_index': item,
+                'food_item_id': food_item.get('_id'),
+                'recipient_id': record.id,
+                'recipient_name': record.name or 'Unknown',
+                'quantity': quantities[item],
+                'score': round(score, 3),
+                'distance_km': round(float(haversine_km(items['lngs'][item], items['lats'][item],
+                                                        store.lngs[row], store.lats[row])), 1)
+            })
+            continue
+
+        if has_candidates[item]:
+            reason = 'capacity' if item in reached else 'time_budget'
+        elif item >= scored:
+            reason = 'time_budget'
+        else:
+            reason = 'no_match'
+        unassigned.append({'item_index': item, 'food_item_id': food_item.get('_id'), 'reason': reason})
+
+    return {
+        'assignments': assignments,
+        'unassigned': unassigned,
+        'complete': not any(entry['reason'] == 'time_budget' for entry in unassigned),
+        'elapsed_ms': round((clock() - started) * 1000, 1)
+    }
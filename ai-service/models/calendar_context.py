@@ -0,0 +1,182 @@
+"""Time and holiday features for surplus prediction
+
+HolidayCalendar knows the public holidays of a region (HOLIDAY_REGIONS)
+plus any extra dates configured. CalendarContext builds, once per day, a
+24-row table of the hourly time features, so a prediction looks its
+features up instead of recomputing them, and many timestamps are joined
+against the tables in one step.
+"""
+import logging
+import threading
+from calendar import isleap
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIME_FEATURES = ('hour', 'day_of_week', 'is_weekend', 'is_rush_hour', 'season', 'is_holiday')
+RUSH_HOURS = (11, 12, 18, 19, 20)
+
+# Holidays per region:
+#   fixed     (month, day)
+#   weekday   (month, weekday, n): the nth weekday of the month, -1 for the last
+#   easter    days relative to Easter Sunday
+#   observed  a fixed holiday on a Sunday is also observed on the Monday
+HOLIDAY_REGIONS = {
+    'US': {
+        'fixed': [(1, 1), (6, 19), (7, 4), (11, 11), (12, 25)],
+        'weekday': [(1, 0, 3), (2, 0, 3), (5, 0, -1), (9, 0, 1), (10, 0, 2), (11, 3, 4)],
+        'easter': [],
+        'observed': False
+    },
+    'KE': {
+        'fixed': [(1, 1), (5, 1), (6, 1), (10, 10), (10, 20), (12, 12), (12, 25), (12, 26)],
+        'weekday': [],
+        'easter': [-2, 1],
+        'observed': True
+    },
+    'GB': {
+        'fixed': [(1, 1), (12, 25), (12, 26)],
+        'weekday': [(5, 0, 1), (5, 0, -1), (8, 0, -1)],
+        'easter': [-2, 1],
+        'observed': False
+    }
+}
+
+
+def easter_sunday(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year, month, weekday, n):
+    """The nth given weekday (Monday=0) of a month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def parse_extra_dates(value):
+    """'12-24,2025-03-31' -> [(12, 24), date(2025, 3, 31)]: yearly MM-DD or one-off YYYY-MM-DD
+
+    Entries that are not a valid date are skipped with a warning; a yearly
+    02-29 is kept and only applies in leap years.
+    """
+    extra = []
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        try:
+            parts = [int(part) for part in item.split('-')]
+            if len(parts) == 3:
+                extra.append(date(*parts))
+            elif len(parts) == 2:
+                date(2000, *parts)  # a leap year, so 02-29 is accepted
+                extra.append(tuple(parts))
+            else:
+                raise ValueError('expected MM-DD or YYYY-MM-DD')
+        except ValueError as e:
+            logger.warning(f"Ignoring extra holiday date {item!r}: {str(e)}")
+    return extra
+
+
+class HolidayCalendar:
+    """Public holidays for a region, plus extra yearly or one-off dates"""
+
+    def __init__(self, region='US', extra_dates=()):
+        if region not in HOLIDAY_REGIONS:
+            raise ValueError(f"Unknown holiday region {region!r}, expected one of {sorted(HOLIDAY_REGIONS)}")
+        self.region = region
+        self.rules = HOLIDAY_REGIONS[region]
+        self.extra_dates = list(extra_dates)
+        self._years = {}
+
+    def holidays(self, year):
+        """The set of holiday dates in a year"""
+        days = self._years.get(year)
+        if days is None:
+            fixed = [date(year, month, day) for month, day in self.rules['fixed']]
+            days = set(fixed)
+            if self.rules['observed']:
+                days.update(day + timedelta(days=1) for day in fixed if day.weekday() == 6)
+            days.update(nth_weekday(year, *rule) for rule in self.rules['weekday'])
+            easter = easter_sunday(year)
+            days.update(easter + timedelta(days=offset) for offset in self.rules['easter'])
+            for extra in self.extra_dates:
+                if isinstance(extra, date):
+                    if extra.year == year:
+                        days.add(extra)
+                elif extra != (2, 29) or isleap(year):
+                    days.add(date(year, *extra))
+            self._years[year] = days = frozenset(days)
+        return days
+
+    def is_holiday(self, day):
+        if isinstance(day, datetime):
+            day = day.date()
+        return day in self.holidays(day.year)
+
+
+class DayTable:
+    """The time features of every hour of one day, as rows and as columns"""
+
+    def __init__(self, day, holiday):
+        weekday = day.weekday()
+        self.rows = [{
+            'hour': hour,
+            'day_of_week': weekday,
+            'is_weekend': weekday >= 5,
+            'is_rush_hour': hour in RUSH_HOURS,
+            'season': (day.month % 12) // 3 + 1,
+            'is_holiday': holiday
+        } for hour in range(24)]
+        self.columns = {
+            name: np.array([row[name] for row in self.rows], dtype=float)
+            for name in TIME_FEATURES
+        }
+
+
+class CalendarContext:
+    """Hourly time features looked up from per-day tables built on first use"""
+
+    def __init__(self, calendar, max_days=64):
+        self.calendar = calendar
+        self.max_days = max_days
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def day_table(self, day):
+        table = self._tables.get(day)
+        if table is None:
+            table = DayTable(day, self.calendar.is_holiday(day))
+            with self._lock:
+                if len(self._tables) >= self.max_days:
+                    self._tables.pop(next(iter(self._tables)))
+                self._tables[day] = table
+        return table
+
+    def features_at(self, moment):
+        """Time features for one datetime, as a new dict"""
+        return dict(self.day_table(moment.date()).rows[moment.hour])
+
+    def features_for(self, moments):
+        """Time feature columns (float arrays) for many datetimes, one join per feature"""
+        days = sorted({moment.date() for moment in moments})
+        offsets = {day: 24 * i for i, day in enumerate(days)}
+        tables = [self.day_table(day).columns for day in days]
+        positions = np.array([offsets[moment.date()] + moment.hour for moment in moments], dtype=np.intp)
+        return {
+            name: np.concatenate([table[name] for table in tables])[positions]
+            for name in TIME_FEATURES
+        }
@@ -0,0 +1,93 @@
+"""Great-circle distances shared by the matchers
+
+Coordinates are passed longitude first, as in GeoJSON. Three modes:
+  haversine  spherical Haversine; within 0.6% of the WGS-84 geodesic
+  fast       equirectangular approximation for pairs under FAST_PATH_MAX_KM
+             (under 0.01% from Haversine there, up to 70 degrees latitude),
+             Haversine beyond it
+  exact      ellipsoidal geodesic via geopy, one pair at a time (slow)
+
+geopy is optional and not in requirements.txt; without it 'exact' raises
+ImportError.
+"""
+from importlib.util import find_spec
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+FAST_PATH_MAX_KM = 100
+DISTANCE_MODES = ('haversine', 'fast', 'exact')
+GEOPY_AVAILABLE = find_spec('geopy') is not None
+GEOPY_MISSING = "Distance mode 'exact' needs geopy, which is not installed (pip install geopy)"
+
+
+def point_distance_km(lng1, lat1, lng2, lat2):
+    """Haversine distance between two points, for scalar callers"""
+    lat1, lon1 = radians(lat1), radians(lng1)
+    lat2, lon2 = radians(lat2), radians(lng2)
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km(lng, lat, lngs, lats):
+    """Distance in km from one point to many using the Haversine formula"""
+    lat1, lon1 = np.radians(lat), np.radians(lng)
+    lat2, lon2 = np.radians(lats), np.radians(lngs)
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def equirectangular_km(lng, lat, lngs, lats):
+    """Flat-earth approximation of one-to-many distances, accurate at short range"""
+    lngs = np.asarray(lngs, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+
+    # Work in degrees and convert once at the end; wrap longitude differences
+    # only when a pair actually crosses the antimeridian
+    dlon = lngs - lng
+    if dlon.size and np.abs(dlon).max() > 180:
+        dlon = (dlon + 180) % 360 - 180
+
+    x = dlon * np.cos((lats + lat) * (np.pi / 360))
+    y = lats - lat
+    return (EARTH_RADIUS_KM * np.pi / 180) * np.sqrt(x * x + y * y)
+
+
+def geodesic_km(lng, lat, lngs, lats):
+    """Ellipsoidal (WGS-84) distances via geopy; accurate but per-pair slow"""
+    if not GEOPY_AVAILABLE:
+        raise ImportError(GEOPY_MISSING)
+    from geopy.distance import geodesic
+
+    return np.array([
+        geodesic((lat, lng), (other_lat, other_lng)).kilometers
+        for other_lng, other_lat in zip(np.atleast_1d(lngs).tolist(), np.atleast_1d(lats).tolist())
+    ])
+
+
+def distance_km(lng, lat, lngs, lats, mode='haversine'):
+    """One-to-many distances in km using the given mode"""
+    if mode == 'haversine':
+        return haversine_km(lng, lat, lngs, lats)
+    if mode == 'fast':
+        distances = equirectangular_km(lng, lat, lngs, lats)
+        far = distances > FAST_PATH_MAX_KM
+        if far.any():
+            distances[far] = haversine_km(lng, lat, np.asarray(lngs)[far], np.asarray(lats)[far])
+        return distances
+    if mode == 'exact':
+        return geodesic_km(lng, lat, lngs, lats)
+    raise ValueError(f"Unknown distance mode {mode!r}, expected one of {DISTANCE_MODES}")
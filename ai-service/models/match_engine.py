@@ -0,0 +1,235 @@
+import heapq
+from contextlib import nullcontext
+from itertools import islice
+
+import numpy as np
+
+from models.geo import distance_km
+
+# Scoring constants shared with the scalar calculate_match_score in app.py
+MAX_DISTANCE_KM = 50
+MATCH_THRESHOLD = 0.3
+MATCH_WEIGHTS = {'distance': 0.4, 'urgency': 0.3, 'capacity': 0.2, 'preference': 0.1}
+
+
+def urgency_scores(expiry_epochs, now):
+    """Vectorized app.calculate_urgency_score from expiry times in epoch seconds
+
+    NaN marks an expiry calculate_urgency_score could not use (score 0.5).
+    """
+    hours_until_expiry = (np.asarray(expiry_epochs, dtype=float) - now) / 3600
+    scores = np.select(
+        [hours_until_expiry <= 2, hours_until_expiry <= 6, hours_until_expiry <= 24],
+        [1.0, 0.8, 0.6],
+        default=0.4
+    )
+    return np.where(np.isnan(hours_until_expiry), 0.5, scores)
+
+
+def _profiles(recipients):
+    """(coordinates, capacity, restrictions, preferred categories) per recipient dict"""
+    for recipient in recipients:
+        profile = recipient['profile']
+        yield (
+            profile['location']['coordinates'],
+            profile.get('servingCapacity', 50),
+            profile.get('dietaryRestrictions', []),
+            profile.get('preferredCategories', [])
+        )
+
+
+def _typed_profiles(recipients):
+    """_profiles for recipients decoded into models.schemas.Recipient"""
+    for recipient in recipients:
+        profile = recipient.profile
+        yield (
+            profile.location.coordinates,
+            50 if profile.serving_capacity is None else profile.serving_capacity,
+            [] if profile.dietary_restrictions is None else profile.dietary_restrictions,
+            [] if profile.preferred_categories is None else profile.preferred_categories
+        )
+
+
+def _pack(food_item, count, profiles):
+    """The pack_recipients arrays from `count` (coordinates, capacity, restrictions, categories) tuples"""
+    food_dietary_info = food_item.get('dietaryInfo', [])
+    food_is_vegan = 'vegan' in food_dietary_info
+    food_category = food_item.get('category', '')
+
+    lngs = np.empty(count)
+    lats = np.empty(count)
+    capacities = np.empty(count)
+    restriction_matches = np.zeros(count, dtype=np.int64)
+    category_matches = np.zeros(count, dtype=bool)
+
+    for i, (coordinates, capacity, restrictions, categories) in enumerate(profiles):
+        lngs[i] = coordinates[0]
+        lats[i] = coordinates[1]
+        capacities[i] = capacity
+
+        matched = 0
+        for restriction in restrictions:
+            if restriction in food_dietary_info:
+                matched += 1
+            elif restriction == 'vegetarian' and food_is_vegan:
+                matched += 1
+        restriction_matches[i] = matched
+        category_matches[i] = food_category in categories
+
+    return {
+        'lngs': lngs,
+        'lats': lats,
+        'capacities': capacities,
+        'restriction_matches': restriction_matches,
+        'category_matches': category_matches
+    }
+
+
+def pack_recipients(food_item, recipients):
+    """Pack recipient coordinates, capacities and preference flags into arrays"""
+    return _pack(food_item, len(recipients), _profiles(recipients))
+
+
+def pack_typed_recipients(food_item, recipients):
+    """pack_recipients for recipients decoded into models.schemas.Recipient"""
+    return _pack(food_item, len(recipients), _typed_profiles(recipients))
+
+
+def capacity_scores(food_quantity, capacities):
+    """Vectorized equivalent of app.calculate_capacity_score"""
+    safe_capacities = np.where(capacities > 0, capacities, 1)
+    ratio = food_quantity / safe_capacities
+
+    return np.select(
+        [capacities <= 0, (ratio >= 0.1) & (ratio <= 1.5), ratio < 0.1, ratio > 3],
+        [0.5, 1.0, 0.3, 0.2],
+        default=0.7
+    )
+
+
+def preference_scores(restriction_matches, category_matches):
+    """Vectorized equivalent of app.calculate_preference_score"""
+    # Accumulate 0.2 per match in the same order as the scalar loop so the
+    # floating point results are bit-for-bit identical
+    max_matches = int(restriction_matches.max()) if len(restriction_matches) else 0
+    table = [0.5]
+    for _ in range(max_matches):
+        table.append(table[-1] + 0.2)
+
+    scores = np.array(table)[restriction_matches]
+    scores = np.where(category_matches, scores + 0.2, scores)
+    return np.minimum(1.0, scores)
+
+
+def score_recipients(food_item, recipients, urgency_score, distance_mode='haversine'):
+    """Score every recipient against a food item in one vectorized pass"""
+    return score_packed(food_item, pack_recipients(food_item, recipients), urgency_score, distance_mode)
+
+
+def score_packed(food_item, packed, urgency_score, distance_mode='haversine'):
+    """Score recipients already packed into arrays (see pack_recipients)"""
+    food_coordinates = food_item['location']['coordinates']
+
+    distances = distance_km(food_coordinates[0], food_coordinates[1], packed['lngs'], packed['lats'],
+                            mode=distance_mode)
+    distance = np.maximum(0, 1 - (distances / MAX_DISTANCE_KM))
+    capacity = capacity_scores(food_item['quantity']['value'], packed['capacities'])
+    preference = preference_scores(packed['restriction_matches'], packed['category_matches'])
+
+    overall = (
+        distance * MATCH_WEIGHTS['distance'] +
+        urgency_score * MATCH_WEIGHTS['urgency'] +
+        capacity * MATCH_WEIGHTS['capacity'] +
+        preference * MATCH_WEIGHTS['preference']
+    )
+
+    return {
+        'overall': overall,
+        'distance_km': distances,
+        'distance': distance,
+        'urgency': urgency_score,
+        'capacity': capacity,
+        'preference': preference
+    }
+
+
+def select_top_matches(overall_scores, limit=5, threshold=MATCH_THRESHOLD):
+    """Return (indices, rounded scores, total) of the best scores above threshold"""
+    # Only scores above the threshold can round to something above it; the
+    # survivors are rounded with Python's round() to match the scalar path
+    candidates = np.flatnonzero(overall_scores > threshold)
+    rounded = np.array([round(score, 3) for score in overall_scores[candidates].tolist()], dtype=float)
+
+    keep = rounded > threshold
+    candidates, rounded = candidates[keep], rounded[keep]
+
+    # Partition out the top scores (plus any ties) before the stable sort
+    order = np.arange(len(rounded))
+    if 0 < limit < len(rounded):
+        kth = np.partition(rounded, len(rounded) - limit)[len(rounded) - limit]
+        order = np.flatnonzero(rounded >= kth)
+    order = order[np.argsort(-rounded[order], kind='stable')][:limit]
+    return candidates[order], rounded[order], len(candidates)
+
+
+def stream_top_matches(food_item, recipients, urgency_score, limit=5, chunk_size=4096,
+                       threshold=MATCH_THRESHOLD, timer=None, distance_mode='haversine', pack=pack_recipients):
+    """Return (top matches, total) from any iterable of recipients, one chunk at a time
+
+    `timer(stage)`, if given, is a context manager wrapped around the
+    'match_scoring' and 'match_selection' stages of every chunk.
+    `distance_mode` is passed through to models.geo.distance_km; `pack` turns
+    a chunk of recipients into arrays (pack_typed_recipients for schemas).
+    """
+    iterator = iter(recipients)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    return _top_matches(food_item, chunks, pack, urgency_score, limit, threshold, timer, distance_mode)
+
+
+def store_top_matches(food_item, store, rows, urgency_score, limit=5, chunk_size=4096,
+                      threshold=MATCH_THRESHOLD, timer=None, distance_mode='haversine'):
+    """stream_top_matches over rows of a RecipientStore; matches carry rebuilt recipient dicts"""
+    chunks = (rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size))
+    matches, total = _top_matches(food_item, chunks, store.pack, urgency_score, limit, threshold, timer, distance_mode)
+    for match in matches:
+        match['recipient'] = store.to_dict(match['recipient'])
+    return matches, total
+
+
+def _top_matches(food_item, chunks, pack, urgency_score, limit, threshold, timer, distance_mode):
+    timer = timer or (lambda stage: nullcontext())
+    # Min-heap of the best matches so far; on equal scores the earlier
+    # recipient wins, like a stable sort over the whole list would
+    heap = []
+    total = 0
+    offset = 0
+
+    for chunk in chunks:
+        with timer('match_scoring'):
+            scores = score_packed(food_item, pack(food_item, chunk), urgency_score, distance_mode)
+        with timer('match_selection'):
+            indices, rounded, count = select_top_matches(scores['overall'], limit, threshold)
+        total += count
+
+        for index, score in zip(indices.tolist(), rounded.tolist()):
+            key = (score, -(offset + index))
+            if len(heap) >= limit and key <= heap[0][0]:
+                break
+            match = {
+                'recipient': chunk[index],
+                'score': score,
+                'distance_km': float(scores['distance_km'][index]),
+                'distance': float(scores['distance'][index]),
+                'urgency': urgency_score,
+                'capacity': float(scores['capacity'][index]),
+                'preference': float(scores['preference'][index])
+            }
+            if len(heap) < limit:
+                heapq.heappush(heap, (key, match))
+            else:
+                heapq.heapreplace(heap, (key, match))
+
+        offset += len(chunk)
+
+    heap.sort(key=lambda entry: entry[0], reverse=True)
+    return [match for _, match in heap], total
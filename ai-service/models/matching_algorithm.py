@@ -1,23 +1,32 @@
 # ai-service/models/matching_algorithm.py
+import heapq
+from itertools import islice
 import numpy as np
-from geopy.distance import geodesic
 from datetime import datetime, timedelta
 
+from models.geo import DISTANCE_MODES, GEOPY_AVAILABLE, GEOPY_MISSING, distance_km
+
 class SmartMatcher:
-    def __init__(self):
+    def __init__(self, distance_mode='haversine', chunk_size=1024):
+        """distance_mode is 'haversine' (default), 'fast' or 'exact' (geopy geodesic)"""
+        if distance_mode not in DISTANCE_MODES:
+            raise ValueError(f"Unknown distance mode {distance_mode!r}")
+        if distance_mode == 'exact' and not GEOPY_AVAILABLE:
+            raise ImportError(GEOPY_MISSING)
+        self.distance_mode = distance_mode
+        self.chunk_size = chunk_size
         self.weight_distance = 0.4
         self.weight_urgency = 0.3
         self.weight_capacity = 0.2
         self.weight_preference = 0.1
     
-    def calculate_match_score(self, food_item, recipient):
+    def calculate_match_score(self, food_item, recipient, distance=None):
         """Calculate compatibility score between food and recipient"""
         
-        # Distance score (closer = better)
-        distance = geodesic(
-            (food_item['lat'], food_item['lng']),
-            (recipient['lat'], recipient['lng'])
-        ).kilometers
+        # Distance score (closer = better); callers scoring many recipients
+        # pass distances computed in bulk
+        if distance is None:
+            distance = self.distances(food_item, [recipient])[0]
         
         distance_score = max(0, 1 - (distance / 50))  # 50km max reasonable distance
         
@@ -52,6 +61,12 @@ class SmartMatcher:
             'estimated_impact': self._calculate_impact(food_item, recipient)
         }
     
+    def distances(self, food_item, recipients):
+        """Distances in km from the food item to each recipient"""
+        lngs = np.fromiter((recipient['lng'] for recipient in recipients), dtype=float, count=len(recipients))
+        lats = np.fromiter((recipient['lat'] for recipient in recipients), dtype=float, count=len(recipients))
+        return distance_km(food_item['lng'], food_item['lat'], lngs, lats, mode=self.distance_mode).tolist()
+    
     def _calculate_preference_match(self, food_item, recipient):
         """Calculate how well food matches recipient preferences"""
         score = 0.5  # baseline
@@ -89,16 +104,32 @@ class SmartMatcher:
     
     def find_best_matches(self, food_item, recipients, limit=5):
         """Find best recipient matches for a food item"""
-        matches = []
+        matches, _ = self.rank_matches(food_item, recipients, limit)
+        return matches
+    
+    def rank_matches(self, food_item, recipients, limit=5, min_score=None):
+        """Return (best matches, total matches) from any iterable of recipients"""
+        total = 0
         
-        for recipient in recipients:
-            score_data = self.calculate_match_score(food_item, recipient)
-            matches.append({
-                'recipient_id': recipient['_id'],
-                'recipient_name': recipient['name'],
-                'score_data': score_data
-            })
+        def scored_recipients():
+            nonlocal total
+            iterator = iter(recipients)
+            # Distances are computed a chunk at a time in one vectorized call
+            while True:
+                chunk = list(islice(iterator, self.chunk_size))
+                if not chunk:
+                    break
+                for recipient, distance in zip(chunk, self.distances(food_item, chunk)):
+                    score_data = self.calculate_match_score(food_item, recipient, distance)
+                    if min_score is not None and score_data['overall_score'] <= min_score:
+                        continue
+                    total += 1
+                    yield {
+                        'recipient_id': recipient['_id'],
+                        'recipient_name': recipient['name'],
+                        'score_data': score_data
+                    }
         
-        # Sort by score and return top matches
-        matches.sort(key=lambda x: x['score_data']['overall_score'], reverse=True)
-        return matches[:limit]
\ No newline at end of file
+        # Bounded heap keeps only `limit` matches in memory; ties keep input order
+        matches = heapq.nlargest(limit, scored_recipients(), key=lambda x: x['score_data']['overall_score'])
+        return matches, total
@@ -0,0 +1,164 @@
+import json
+import math
+import os
+import threading
+import time
+
+from services.file_lock import exclusive_lock
+
+
+class OutcomeLearner:
+    """Per-business surplus averages learned online from reported outcomes
+
+    Every outcome moves the business's exponential moving average of
+    surplus (kg) towards the observed value, so predictions follow what
+    actually happened without retraining. With a `checkpoint_path` the
+    workers share one state on disk: outcomes a worker ingests are kept as
+    pending until its next checkpoint, which replays them onto the latest
+    checkpoint under a file lock. A checkpoint is due `checkpoint_interval`
+    seconds after the previous one and is written by the next ingest or
+    refresh (every prediction refreshes), so pending outcomes don't wait
+    for more outcomes to arrive. No worker's outcomes are lost; between
+    checkpoints each worker sees the shared state plus its own pending
+    outcomes.
+    """
+
+    def __init__(self, alpha=0.2, min_observations=3, checkpoint_path=None, checkpoint_interval=60,
+                 clock=time.monotonic):
+        if not 0 < alpha <= 1:
+            raise ValueError(f"EMA alpha must be in (0, 1], got {alpha}")
+        self.alpha = alpha
+        self.min_observations = min_observations
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+        # business_id -> [average_kg, observations, updated_at (epoch seconds)]
+        self._state = {}
+        # (business_id, surplus_kg, observed_at) not yet in the checkpoint
+        self._pending = []
+        # (inode, mtime) of the checkpoint last read or written; every write
+        # replaces the file, so a new inode spots writes within one mtime tick
+        self._checkpoint_version = None
+        self._next_checkpoint = clock() + checkpoint_interval
+        self._next_refresh = clock() + checkpoint_interval
+        self._lock = threading.Lock()
+
+        if checkpoint_path:
+            self._load()
+
+    def __len__(self):
+        return len(self._state)
+
+    def ingest(self, outcomes):
+        """Apply outcomes ({'business_id', 'surplus_kg'}) in order and return how many were applied
+
+        Raises ValueError, before applying any, if an outcome is malformed.
+        """
+        now = time.time()
+        updates = []
+        for position, outcome in enumerate(outcomes):
+            business_id = outcome.get('business_id')
+            surplus = outcome.get('surplus_kg')
+            if business_id is None:
+                raise ValueError(f"Outcome {position} has no business_id")
+            if isinstance(surplus, bool) or not isinstance(surplus, (int, float)) or not math.isfinite(surplus) or surplus < 0:
+                raise ValueError(f"Outcome {position} needs a non-negative surplus_kg")
+            updates.append((str(business_id), float(surplus), now))
+
+        with self._lock:
+            self._apply(self._state, updates)
+            if self.checkpoint_path:
+                self._pending.extend(updates)
+
+        if self.clock() >= self._next_checkpoint:
+            self.checkpoint()
+        return len(updates)
+
+    def average(self, business_id):
+        """Learned average surplus, or None until the business has min_observations outcomes"""
+        if business_id is None:
+            return None
+        entry = self._state.get(str(business_id))
+        if entry is None or entry[1] < self.min_observations:
+            return None
+        return round(entry[0], 3)
+
+    def describe(self, business_id):
+        entry = self._state.get(str(business_id))
+        if entry is None:
+            return None
+        average, observations, updated_at = entry
+        return {
+            'business_id': str(business_id),
+            'average_surplus_kg': round(average, 3),
+            'observations': observations,
+            'updated_at': updated_at,
+            'used_for_predictions': observations >= self.min_observations
+        }
+
+    def checkpoint(self):
+        """Replay pending outcomes onto the latest checkpoint and write it back"""
+        self._next_checkpoint = self.clock() + self.checkpoint_interval
+        if not self.checkpoint_path or not self._pending:
+            return False
+
+        with self._lock, exclusive_lock(f"{self.checkpoint_path}.lock"):
+            state = self._read()
+            self._apply(state, self._pending)
+            temp_path = f"{self.checkpoint_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.checkpoint_path)
+            self._checkpoint_version = self._version()
+            self._state = state
+            self._pending = []
+        return True
+
+    def refresh(self):
+        """Write pending outcomes once a checkpoint is due and pick up checkpoints from other workers
+
+        Each is done at most once per interval.
+        """
+        if not self.checkpoint_path:
+            return
+        if self._pending and self.clock() >= self._next_checkpoint:
+            self.checkpoint()
+        if self.clock() < self._next_refresh:
+            return
+        self._next_refresh = self.clock() + self.checkpoint_interval
+        self._load()
+
+    def _load(self):
+        try:
+            version = self._version()
+        except OSError:
+            return
+        if version == self._checkpoint_version:
+            return
+
+        state = self._read()
+        with self._lock:
+            self._apply(state, self._pending)
+            self._state = state
+            self._checkpoint_version = version
+
+    def _version(self):
+        stat = os.stat(self.checkpoint_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _apply(self, state, updates):
+        for business_id, surplus, observed_at in updates:
+            entry = state.get(business_id)
+            if entry is None:
+                state[business_id] = [surplus, 1, observed_at]
+            else:
+                entry[0] += self.alpha * (surplus - entry[0])
+                entry[1] += 1
+                entry[2] = observed_at
@@ -0,0 +1,209 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from models.batch_assignment import pack_food_items, score_components
+from models.geo import haversine_km
+from models.match_engine import MATCH_THRESHOLD, MATCH_WEIGHTS, urgency_scores
+from services.metrics import record_cache_lookup
+
+SESSION_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+SESSION_ARRAYS = (
+    'weighted_distance', 'weighted_capacity', 'weighted_preference', 'expiry_epochs',
+    'item_lngs', 'item_lats', 'recipient_lngs', 'recipient_lats'
+)
+SESSION_LISTS = ('food_item_ids', 'recipient_ids', 'recipient_names')
+
+
+class RankingSession:
+    """Food items x recipients whose time-independent scores are computed once
+
+    Distance, capacity and preference only depend on the pair, so they are
+    weighted and kept; rank() only recomputes urgency from the stored expiry
+    times. The weighted terms are added in the same order as the one-shot
+    score so refreshed scores are identical to re-scoring from scratch.
+    """
+
+    def __init__(self, food_items, store, rows, expiry_epochs):
+        """rows must select at least one recipient of the store"""
+        rows = np.asarray(rows, dtype=np.intp)
+        items = pack_food_items(food_items, store)
+        distance, capacity, preference = score_components(items, store, rows)
+
+        self.weighted_distance = distance * MATCH_WEIGHTS['distance']
+        self.weighted_capacity = capacity * MATCH_WEIGHTS['capacity']
+        self.weighted_preference = preference * MATCH_WEIGHTS['preference']
+        self.expiry_epochs = np.asarray(expiry_epochs, dtype=float)
+
+        self.food_item_ids = [food_item.get('_id') for food_item in food_items]
+        self.item_lngs, self.item_lats = items['lngs'], items['lats']
+        self.recipient_lngs, self.recipient_lats = store.lngs[rows], store.lats[rows]
+        self.recipient_ids = [store.records[row].id for row in rows.tolist()]
+        self.recipient_names = [store.records[row].name or 'Unknown' for row in rows.tolist()]
+
+    @property
+    def pairs(self):
+        return self.weighted_distance.size
+
+    def save(self, file):
+        """Write the session as an uncompressed .npz (ids and names as JSON)"""
+        arrays = {name: getattr(self, name) for name in SESSION_ARRAYS}
+        lists = {name: getattr(self, name) for name in SESSION_LISTS}
+        np.savez(file, meta=np.array(json.dumps(lists)), **arrays)
+
+    @classmethod
+    def load(cls, file):
+        session = cls.__new__(cls)
+        with np.load(file) as data:
+            for name in SESSION_ARRAYS:
+                setattr(session, name, data[name])
+            for name, values in json.loads(str(data['meta'])).items():
+                setattr(session, name, values)
+        return session
+
+    def rank(self, now, limit=5, threshold=MATCH_THRESHOLD):
+        """Top recipients per food item with urgency as of `now` (epoch seconds)"""
+        urgency = urgency_scores(self.expiry_epochs, now)
+        overall = (
+            self.weighted_distance +
+            urgency[:, None] * MATCH_WEIGHTS['urgency'] +
+            self.weighted_capacity +
+            self.weighted_preference
+        )
+        # Rank on rounded scores like the one-shot route: ties go to the
+        # earlier recipient
+        rounded = np.round(overall, 3)
+        totals = (rounded > threshold).sum(axis=1)
+        limit = max(1, min(limit, rounded.shape[1]))
+        kth = -np.partition(-rounded, limit - 1, axis=1)[:, limit - 1]
+
+        rankings = []
+        for item in range(rounded.shape[0]):
+            scores = rounded[item]
+            columns = np.flatnonzero((scores >= kth[item]) & (scores > threshold))
+            columns = columns[np.argsort(-scores[columns], kind='stable')][:limit]
+            distances = haversine_km(self.item_lngs[item], self.item_lats[item],
+                                     self.recipient_lngs[columns], self.recipient_lats[columns])
+            rankings.append({
+                'item_index': item,
+                'food_item_id': self.food_item_ids[item],
+                'urgency_score': round(float(urgency[item]), 2),
+                'total_potential_recipients': int(totals[item]),
+                'matches': [{
+                    'recipient_id': self.recipient_ids[column],
+                    'recipient_name': self.recipient_names[column],
+                    'score': float(scores[column]),
+                    'distance_km': round(float(distance_km), 1)
+                } for column, distance_km in zip(columns.tolist(), distances.tolist())]
+            })
+        return rankings
+
+
+class RankingSessionStore:
+    """Ranking sessions by id, shared between workers through `directory`
+
+    Sessions are written to `directory` so any worker can refresh one, and
+    each worker keeps those it used recently in memory up to `cache_pairs`
+    pairs in total. Without a directory the memory is the only copy: a
+    session is then only found by the worker that created it (so run a
+    single worker), and the oldest are dropped beyond cache_pairs.
+    Sessions expire `ttl` seconds after they were created.
+    """
+
+    def __init__(self, directory=None, ttl=1800, cache_pairs=2_000_000, clock=time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self.cache_pairs = cache_pairs
+        self.clock = clock
+        self._cache = OrderedDict()
+        self._cached_pairs = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}.npz")
+
+    def set(self, session_id, session):
+        created_at = self.clock()
+        if self.directory:
+            self._sweep()
+            temp_path = f"{self._path(session_id)}.tmp"
+            with open(temp_path, 'wb') as f:
+                session.save(f)
+            os.utime(temp_path, (created_at, created_at))
+            os.replace(temp_path, self._path(session_id))
+        self._remember(session_id, session, created_at)
+
+    def get(self, session_id):
+        session = self._get(session_id)
+        record_cache_lookup('match_sessions', session is not None)
+        return session
+
+    def _get(self, session_id):
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            return None
+
+        with self._lock:
+            entry = self._cache.get(session_id)
+            if entry is not None:
+                self._cache.move_to_end(session_id)
+        if entry is not None:
+            session, created_at = entry
+            if self.clock() - created_at < self.ttl:
+                return session
+            self.delete(session_id)
+            return None
+
+        if not self.directory:
+            return None
+        try:
+            created_at = os.path.getmtime(self._path(session_id))
+            if self.clock() - created_at >= self.ttl:
+                self.delete(session_id)
+                return None
+            session = RankingSession.load(self._path(session_id))
+        except OSError:
+            return None
+        self._remember(session_id, session, created_at)
+        return session
+
+    def delete(self, session_id):
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            return
+        with self._lock:
+            entry = self._cache.pop(session_id, None)
+            if entry is not None:
+                self._cached_pairs -= entry[0].pairs
+        if self.directory:
+            try:
+                os.remove(self._path(session_id))
+            except OSError:
+                pass
+
+    def _remember(self, session_id, session, created_at):
+        with self._lock:
+            previous = self._cache.pop(session_id, None)
+            if previous is not None:
+                self._cached_pairs -= previous[0].pairs
+            self._cache[session_id] = (session, created_at)
+            self._cached_pairs += session.pairs
+            while self._cached_pairs > self.cache_pairs and len(self._cache) > 1:
+                _, (evicted, _) = self._cache.popitem(last=False)
+                self._cached_pairs -= evicted.pairs
+
+    def _sweep(self):
+        """Remove expired session files"""
+        now = self.clock()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith('.npz') and now - os.path.getmtime(path) >= self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,262 @@
+import json
+import math
+import os
+import threading
+from contextlib import nullcontext
+
+import numpy as np
+
+from models.batch_assignment import assign_batch
+from models.geo import EARTH_RADIUS_KM, haversine_km
+from models.match_engine import store_top_matches
+from models.ranking_session import RankingSession
+from models.recipient_store import RecipientStore
+from services.file_lock import exclusive_lock
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class RecipientRegistry:
+    """Recipients held between requests, indexed on a lat/lng grid
+
+    Recipients are kept in a columnar RecipientStore rather than as the
+    JSON dicts they arrive in; only the fields used for matching survive.
+    """
+
+    def __init__(self, cell_size_deg=0.5, snapshot_path=None):
+        self.cell_size = cell_size_deg
+        self.rows = int(math.ceil(180 / cell_size_deg))
+        self.cols = int(math.ceil(360 / cell_size_deg))
+        self.snapshot_path = snapshot_path
+        # (inode, mtime) of the snapshot last loaded or saved; every save
+        # replaces the file, so a new inode spots saves within one mtime tick
+        self._snapshot_version = None
+        self._lock = threading.RLock()
+        self._store = RecipientStore()
+        self._row = {}
+        self._position = {}
+        self._next_position = 0
+        self._cell_of = {}
+        self._cells = {}
+
+        if snapshot_path:
+            self.refresh()
+
+    def __len__(self):
+        self.refresh()
+        return len(self._row)
+
+    def _cell(self, lng, lat):
+        row = min(int((lat + 90) // self.cell_size), self.rows - 1)
+        col = int((lng + 180) // self.cell_size) % self.cols
+        return row, col
+
+    def _add(self, recipient):
+        recipient_id = str(recipient['_id'])
+        lng, lat = recipient['profile']['location']['coordinates'][:2]
+        cell = self._cell(float(lng), float(lat))
+
+        self._discard(recipient_id)
+        self._row[recipient_id] = self._store.add(recipient)
+        self._position[recipient_id] = self._next_position
+        self._next_position += 1
+        self._cell_of[recipient_id] = cell
+        self._cells.setdefault(cell, set()).add(recipient_id)
+
+    def _discard(self, recipient_id):
+        cell = self._cell_of.pop(recipient_id, None)
+        if cell is None:
+            return False
+        self._store.discard(self._row.pop(recipient_id))
+        del self._position[recipient_id]
+        members = self._cells[cell]
+        members.discard(recipient_id)
+        if not members:
+            del self._cells[cell]
+        return True
+
+    def upsert(self, recipients):
+        """Add or replace recipients, keyed by _id"""
+        for recipient in recipients:
+            if '_id' not in recipient:
+                raise ValueError("Recipient _id required")
+            try:
+                recipient['profile']['location']['coordinates'][1]
+            except (KeyError, IndexError, TypeError):
+                raise ValueError(f"Recipient {recipient['_id']} has no location coordinates")
+
+        with self._lock, self._snapshot_lock():
+            self.refresh()
+            for recipient in recipients:
+                self._add(recipient)
+            self._save()
+        return len(recipients)
+
+    def remove(self, recipient_ids):
+        """Remove recipients by _id, returning how many were registered"""
+        with self._lock, self._snapshot_lock():
+            self.refresh()
+            removed = sum(1 for recipient_id in recipient_ids if self._discard(str(recipient_id)))
+            if removed:
+                self._save()
+        return removed
+
+    def _cells_within(self, lng, lat, radius_km):
+        """Grid cells overlapping the bounding box of a radius around a point"""
+        dlat = radius_km / KM_PER_DEGREE
+        min_row, _ = self._cell(lng, max(-90, lat - dlat))
+        max_row, _ = self._cell(lng, min(90, lat + dlat))
+
+        # Longitude degrees shrink towards the poles; use the widest latitude
+        widest_lat = min(90, abs(lat) + dlat)
+        cos_lat = math.cos(math.radians(widest_lat))
+        if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+            cols = range(self.cols)
+        else:
+            dlng = radius_km / (KM_PER_DEGREE * cos_lat)
+            first = int((lng - dlng + 180) // self.cell_size)
+            last = int((lng + dlng + 180) // self.cell_size)
+            cols = {col % self.cols for col in range(first, last + 1)}
+
+        for row in range(min_row, max_row + 1):
+            for col in cols:
+                if (row, col) in self._cells:
+                    yield self._cells[(row, col)]
+
+    def _distances(self, lng, lat, recipient_ids):
+        rows = np.fromiter((self._row[recipient_id] for recipient_id in recipient_ids),
+                           dtype=np.intp, count=len(recipient_ids))
+        return haversine_km(lng, lat, self._store.lngs[rows], self._store.lats[rows])
+
+    def _radius_ids(self, lng, lat, radius_km):
+        candidate_ids = [
+            recipient_id
+            for members in self._cells_within(lng, lat, radius_km)
+            for recipient_id in members
+        ]
+        if not candidate_ids:
+            return []
+
+        distances = self._distances(lng, lat, candidate_ids)
+        nearby = [candidate_ids[i] for i in np.flatnonzero(distances <= radius_km)]
+        # Keep registration order so tied scores rank the same way every time
+        nearby.sort(key=self._position.__getitem__)
+        return nearby
+
+    def _nearest_ids(self, lng, lat, k):
+        if not self._row:
+            return []
+
+        # Double the search radius until it holds k recipients or the
+        # whole registry has been scanned
+        radius_km = self.cell_size * KM_PER_DEGREE
+        while True:
+            candidate_ids = [
+                recipient_id
+                for members in self._cells_within(lng, lat, radius_km)
+                for recipient_id in members
+            ]
+            distances = self._distances(lng, lat, candidate_ids)
+            within = np.flatnonzero(distances <= radius_km)
+            if len(within) >= k or len(candidate_ids) == len(self._row):
+                break
+            radius_km *= 2
+
+        if len(within) < k:
+            within = np.arange(len(candidate_ids))
+        closest = within[np.argsort(distances[within], kind='stable')[:k]]
+        return [candidate_ids[i] for i in closest]
+
+    def query_radius(self, lng, lat, radius_km):
+        """Recipients within radius_km of a point, in registration order"""
+        self.refresh()
+        with self._lock:
+            return [self._store.to_dict(self._row[recipient_id])
+                    for recipient_id in self._radius_ids(lng, lat, radius_km)]
+
+    def nearest(self, lng, lat, k):
+        """The k nearest recipients to a point, closest first"""
+        self.refresh()
+        with self._lock:
+            return [self._store.to_dict(self._row[recipient_id])
+                    for recipient_id in self._nearest_ids(lng, lat, k)]
+
+    def top_matches(self, food_item, urgency_score, radius_km=None, nearest=None, **options):
+        """Score registered recipients near a food item straight from the store
+
+        Candidates are the `nearest` closest recipients if given, otherwise
+        those within radius_km. Options are passed to store_top_matches.
+        """
+        lng, lat = food_item['location']['coordinates'][:2]
+        self.refresh()
+        with self._lock:
+            if nearest:
+                recipient_ids = self._nearest_ids(lng, lat, nearest)
+            else:
+                recipient_ids = self._radius_ids(lng, lat, radius_km)
+            rows = np.fromiter((self._row[recipient_id] for recipient_id in recipient_ids),
+                               dtype=np.intp, count=len(recipient_ids))
+            return store_top_matches(food_item, self._store, rows, urgency_score, **options)
+
+    def _ordered_rows(self):
+        ordered = sorted(self._row, key=self._position.__getitem__)
+        return np.fromiter((self._row[recipient_id] for recipient_id in ordered), dtype=np.intp, count=len(ordered))
+
+    def assign_batch(self, food_items, urgency_scores, **options):
+        """Assign food items across all registered recipients (see models.batch_assignment)"""
+        self.refresh()
+        with self._lock:
+            return assign_batch(food_items, self._store, self._ordered_rows(), urgency_scores, **options)
+
+    def ranking_session(self, food_items, expiry_epochs):
+        """A RankingSession of food items against all registered recipients"""
+        self.refresh()
+        with self._lock:
+            return RankingSession(food_items, self._store, self._ordered_rows(), expiry_epochs)
+
+    def _snapshot_lock(self):
+        """Exclusive lock on the snapshot so workers apply changes one at a time
+
+        Writers reload the snapshot under the lock before changing and saving
+        it, so no worker overwrites changes it has not seen yet.
+        """
+        if not self.snapshot_path:
+            return nullcontext()
+        return exclusive_lock(f"{self.snapshot_path}.lock")
+
+    def _save(self):
+        if not self.snapshot_path:
+            return
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, 'w') as f:
+            ordered = sorted(self._row, key=self._position.__getitem__)
+            json.dump([self._store.to_dict(self._row[recipient_id]) for recipient_id in ordered], f)
+        os.replace(temp_path, self.snapshot_path)
+        self._snapshot_version = self._version()
+
+    def _version(self):
+        stat = os.stat(self.snapshot_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self):
+        """Reload the snapshot if another worker has written a newer one"""
+        if not self.snapshot_path:
+            return
+        try:
+            version = self._version()
+        except OSError:
+            return
+        if version == self._snapshot_version:
+            return
+
+        with open(self.snapshot_path) as f:
+            recipients = json.load(f)
+        with self._lock:
+            self._store = RecipientStore()
+            self._row.clear()
+            self._position.clear()
+            self._cell_of.clear()
+            self._cells.clear()
+            for recipient in recipients:
+                self._add(recipient)
+            self._snapshot_version = version
@@ -0,0 +1,195 @@
+import numpy as np
+
+DEFAULT_SERVING_CAPACITY = 50
+WORD_BITS = 64
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(masks):
+        """Number of set bits in each uint64"""
+        return np.bitwise_count(masks)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(masks):
+        """Number of set bits in each uint64 (byte lookup for NumPy < 2.0)"""
+        masks = np.ascontiguousarray(masks, dtype=np.uint64)
+        counts = _BYTE_POPCOUNT[masks.view(np.uint8)]
+        return counts.reshape(masks.shape + (8,)).sum(axis=-1)
+
+
+class TagVocabulary:
+    """Assigns every distinct tag a bit position in a mask"""
+
+    def __init__(self):
+        self.bits = {}
+        self.tags = []
+
+    def __len__(self):
+        return len(self.tags)
+
+    @property
+    def words(self):
+        return max(1, -(-len(self.tags) // WORD_BITS))
+
+    def add(self, tags):
+        """Mask for tags, registering any not seen before"""
+        mask = 0
+        for tag in tags:
+            bit = self.bits.get(tag)
+            if bit is None:
+                bit = self.bits[tag] = len(self.tags)
+                self.tags.append(tag)
+            mask |= 1 << bit
+        return mask
+
+    def mask(self, tags):
+        """Mask for the known tags only; unknown tags cannot match anything"""
+        mask = 0
+        for tag in tags:
+            bit = self.bits.get(tag)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def split(self, mask):
+        """A Python int mask as an array of uint64 words"""
+        return np.array([(mask >> (WORD_BITS * word)) & 0xFFFFFFFFFFFFFFFF for word in range(self.words)],
+                        dtype=np.uint64)
+
+    def decode(self, words):
+        """Tags set in an array of uint64 words, in registration order"""
+        mask = sum(int(value) << (WORD_BITS * word) for word, value in enumerate(words))
+        return [tag for bit, tag in enumerate(self.tags) if mask >> bit & 1]
+
+
+class RecipientRecord:
+    """The per-recipient fields that are not scored"""
+    __slots__ = ('id', 'name', 'serving_capacity')
+
+    def __init__(self, recipient_id, name, serving_capacity):
+        self.id = recipient_id
+        self.name = name
+        self.serving_capacity = serving_capacity
+
+
+class RecipientStore:
+    """Recipients converted once into columns for vectorized scoring
+
+    Coordinates and capacity are float arrays; dietary restrictions and
+    preferred categories are bitmasks, so a recipient's restrictions are
+    treated as a set. Rows of removed recipients are reused.
+    """
+
+    def __init__(self, capacity=1024):
+        self.restrictions = TagVocabulary()
+        self.categories = TagVocabulary()
+        self.lngs = np.empty(capacity)
+        self.lats = np.empty(capacity)
+        self.capacities = np.empty(capacity)
+        self.restriction_masks = np.zeros((capacity, 1), dtype=np.uint64)
+        self.category_masks = np.zeros((capacity, 1), dtype=np.uint64)
+        self.records = []
+        self._free = []
+
+    def __len__(self):
+        return len(self.records) - len(self._free)
+
+    @classmethod
+    def from_recipients(cls, recipients):
+        store = cls(capacity=max(1, len(recipients)))
+        for recipient in recipients:
+            store.add(recipient)
+        return store
+
+    def _grow(self):
+        capacity = 2 * len(self.lngs)
+        for name in ('lngs', 'lats', 'capacities', 'restriction_masks', 'category_masks'):
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _set_mask(self, name, vocabulary, row, mask):
+        masks = getattr(self, name)
+        if vocabulary.words > masks.shape[1]:
+            # More than 64 distinct tags: widen every mask by another word
+            widened = np.zeros((len(masks), vocabulary.words), dtype=np.uint64)
+            widened[:, :masks.shape[1]] = masks
+            masks = widened
+            setattr(self, name, masks)
+        masks[row] = vocabulary.split(mask)
+
+    def add(self, recipient):
+        """Store a recipient dict and return its row"""
+        profile = recipient['profile']
+        lng, lat = profile['location']['coordinates'][:2]
+        serving_capacity = profile.get('servingCapacity')
+
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self.records)
+            if row == len(self.lngs):
+                self._grow()
+            self.records.append(None)
+
+        self.lngs[row] = lng
+        self.lats[row] = lat
+        self.capacities[row] = DEFAULT_SERVING_CAPACITY if serving_capacity is None else serving_capacity
+        self._set_mask('restriction_masks', self.restrictions, row,
+                       self.restrictions.add(profile.get('dietaryRestrictions', [])))
+        self._set_mask('category_masks', self.categories, row,
+                       self.categories.add(profile.get('preferredCategories', [])))
+        self.records[row] = RecipientRecord(recipient.get('_id'), recipient.get('name'), serving_capacity)
+        return row
+
+    def discard(self, row):
+        self.records[row] = None
+        self._free.append(row)
+
+    def rows(self):
+        """Rows of stored recipients, in row order"""
+        return np.array([row for row, record in enumerate(self.records) if record is not None], dtype=np.intp)
+
+    def food_masks(self, food_item):
+        """(restriction, category) masks a food item satisfies, as uint64 words"""
+        food_dietary_info = food_item.get('dietaryInfo', [])
+        accepted = list(food_dietary_info)
+        if 'vegan' in food_dietary_info:
+            # Vegan food also satisfies a vegetarian restriction
+            accepted.append('vegetarian')
+
+        return (
+            self.restrictions.split(self.restrictions.mask(accepted)),
+            self.categories.split(self.categories.mask([food_item.get('category', '')]))
+        )
+
+    def pack(self, food_item, rows):
+        """The packed arrays match_engine scores, for the given rows"""
+        food_restrictions, food_category = self.food_masks(food_item)
+        restriction_masks = self.restriction_masks[rows]
+        category_masks = self.category_masks[rows]
+
+        return {
+            'lngs': self.lngs[rows],
+            'lats': self.lats[rows],
+            'capacities': self.capacities[rows],
+            'restriction_matches': popcount(restriction_masks & food_restrictions).sum(axis=1, dtype=np.int64),
+            'category_matches': (category_masks & food_category).any(axis=1)
+        }
+
+    def to_dict(self, row):
+        """Rebuild the recipient dict (scored fields only) stored at a row"""
+        record = self.records[row]
+        profile = {
+            'location': {'type': 'Point', 'coordinates': [float(self.lngs[row]), float(self.lats[row])]},
+            'dietaryRestrictions': self.restrictions.decode(self.restriction_masks[row]),
+            'preferredCategories': self.categories.decode(self.category_masks[row])
+        }
+        if record.serving_capacity is not None:
+            profile['servingCapacity'] = record.serving_capacity
+
+        recipient = {'_id': record.id, 'profile': profile}
+        if record.name is not None:
+            recipient['name'] = record.name
+        return recipient
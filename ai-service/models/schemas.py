@@ -0,0 +1,54 @@
+"""Typed request schemas, decoded with msgspec when it is installed
+
+Fields the scoring code reads with .get() are Optional with a None
+default, so an explicit null decodes like a missing key: to_builtins
+(services.serialization) omits fields left at their default and the
+.get() fallback applies, as it does for typed recipients in
+models.match_engine.
+Without msgspec the schemas are None and routes read plain dicts.
+"""
+from typing import Annotated, Any, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Numbers keep the int/float type they were sent with, as with json.loads
+Number = Union[int, float]
+
+if msgspec is not None:
+    class Location(msgspec.Struct, omit_defaults=True, gc=False):
+        coordinates: Annotated[List[float], msgspec.Meta(min_length=2)]
+        type: Optional[str] = None
+
+    class Quantity(msgspec.Struct, omit_defaults=True, gc=False):
+        value: Number
+        unit: Optional[str] = None
+
+    class FoodItem(msgspec.Struct, rename='camel', omit_defaults=True, gc=False):
+        location: Location
+        quantity: Quantity
+        id: Any = msgspec.field(name='_id', default=None)
+        category: Optional[str] = None
+        dietary_info: Optional[List[str]] = None
+        expires_at: Optional[str] = None
+        estimated_value: Optional[Number] = None
+
+    class RecipientProfile(msgspec.Struct, rename='camel', omit_defaults=True, gc=False):
+        location: Location
+        serving_capacity: Optional[Number] = None
+        dietary_restrictions: Optional[List[str]] = None
+        preferred_categories: Optional[List[str]] = None
+
+    class Recipient(msgspec.Struct, omit_defaults=True, gc=False):
+        profile: RecipientProfile
+        id: Any = msgspec.field(name='_id', default=None)
+        name: Optional[str] = None
+
+    class MatchRequest(msgspec.Struct, gc=False):
+        food_item: Optional[FoodItem] = None
+        recipients: Optional[List[Recipient]] = None
+        nearest: Optional[int] = None
+else:
+    Location = Quantity = FoodItem = RecipientProfile = Recipient = MatchRequest = None
@@ -1,60 +1,159 @@
-# ai-service/models/surplus_prediction.py
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
-import joblib
+import time
+
 import numpy as np
 
+# pandas, scikit-learn and joblib are imported where they are used, so the
+# business type helpers can be imported without paying for them
+
+# Business types as stored on the User model; index is the model encoding
+BUSINESS_TYPES = ['restaurant', 'grocery', 'bakery', 'cafe', 'catering', 'other']
+
+
+def encode_business_type(business_type):
+    """Stable numeric code for a business type (unknown types map to 'other')"""
+    if business_type in BUSINESS_TYPES:
+        return BUSINESS_TYPES.index(business_type)
+    return BUSINESS_TYPES.index('other')
+
+
+def load_history(path):
+    """Read surplus history from a CSV or Parquet file"""
+    import pandas as pd
+
+    if str(path).endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
 class SurplusPredictionModel:
+    TARGET = 'surplus_kg'
+
     def __init__(self):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
         self.features = [
             'day_of_week', 'hour', 'weather_temp', 'weather_condition',
-            'local_events', 'historical_surplus', 'business_type', 
+            'local_events', 'historical_surplus', 'business_type',
             'season', 'holiday_indicator', 'promotion_active'
         ]
-    
+        self.trained_at = None
+        self.load_seconds = None
+
     def prepare_features(self, data):
         """Engineer features for prediction"""
+        import pandas as pd
+
         df = pd.DataFrame(data)
-        
+        timestamps = pd.to_datetime(df['timestamp'])
+
         # Time features
-        df['day_of_week'] = pd.to_datetime(df['timestamp']).dt.dayofweek
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        df['season'] = pd.to_datetime(df['timestamp']).dt.month % 12 // 3 + 1
-        
+        df['day_of_week'] = timestamps.dt.dayofweek
+        df['hour'] = timestamps.dt.hour
+        df['season'] = timestamps.dt.month % 12 // 3 + 1
+
         # Weather features (from API)
         df['weather_temp'] = df.get('temperature', 20)
         df['weather_condition'] = df.get('weather_code', 0)
-        
+
         # Business features
-        df['business_type'] = df.get('category', 'restaurant')
+        df['business_type'] = pd.Series(df.get('category', 'restaurant'), index=df.index).map(encode_business_type)
         df['promotion_active'] = df.get('has_promotion', 0)
-        
-        # Historical data
-        df['historical_surplus'] = df.get('avg_weekly_surplus', 0)
-        
+
+        # Historical data: the same per-prediction average (kg) the service
+        # receives as historical_avg_surplus, with the same default
+        df['historical_surplus'] = df.get('historical_avg_surplus', 15.0)
+
         # Local events (calendar API integration)
         df['local_events'] = df.get('event_score', 0)
         df['holiday_indicator'] = df.get('is_holiday', 0)
-        
-        return df[self.features]
-    
+
+        return df[self.features].astype(float)
+
+    def train(self, history):
+        """Fit the scaler and model on a history of observed surplus"""
+        import pandas as pd
+
+        features = self.prepare_features(history)
+        target = pd.DataFrame(history)[self.TARGET].astype(float)
+
+        started = time.perf_counter()
+        features_scaled = self.scaler.fit_transform(features)
+        self.model.fit(features_scaled, target)
+        self.trained_at = pd.Timestamp.now().isoformat()
+
+        return {
+            'rows': len(features),
+            'fit_seconds': round(time.perf_counter() - started, 3),
+            'train_r2': round(self.model.score(features_scaled, target), 3)
+        }
+
+    def save(self, path):
+        """Write an uncompressed artifact so its arrays can be memory-mapped on load"""
+        import joblib
+
+        joblib.dump({
+            'model': self.model,
+            'scaler': self.scaler,
+            'features': self.features,
+            'trained_at': self.trained_at
+        }, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        import joblib
+
+        started = time.perf_counter()
+        artifact = joblib.load(path, mmap_mode='r' if mmap else None)
+
+        predictor = cls()
+        predictor.model = artifact['model']
+        predictor.scaler = artifact['scaler']
+        predictor.features = artifact['features']
+        predictor.trained_at = artifact['trained_at']
+        predictor.load_seconds = time.perf_counter() - started
+        return predictor
+
+    def predict_rows(self, features):
+        """Predict surplus and confidence for a frame of model features"""
+        features_scaled = self.scaler.transform(features[self.features].astype(float))
+
+        # Confidence shrinks as the individual trees disagree more
+        tree_predictions = np.stack([tree.predict(features_scaled) for tree in self.model.estimators_])
+        predictions = tree_predictions.mean(axis=0)
+        spread = tree_predictions.std(axis=0) / (np.abs(predictions) + 1)
+        confidence = 0.95 - np.minimum(0.45, spread)
+
+        return np.maximum(0, predictions), confidence
+
+    def predict_records(self, records):
+        """Predict from dicts keyed by model feature name (business_type may be a name)"""
+        import pandas as pd
+
+        features = pd.DataFrame.from_records(records, columns=self.features)
+        if not pd.api.types.is_numeric_dtype(features['business_type']):
+            features['business_type'] = features['business_type'].map(encode_business_type)
+        return self.predict_rows(features)
+
+    def predict_columns(self, columns):
+        """Predict from equal-length arrays keyed by model feature name (business_type encoded)"""
+        import pandas as pd
+
+        return self.predict_rows(pd.DataFrame({name: columns[name] for name in self.features}))
+
     def predict_surplus(self, business_data):
         """Predict surplus for next 24 hours"""
         features = self.prepare_features(business_data)
-        features_scaled = self.scaler.transform(features)
-        
-        prediction = self.model.predict(features_scaled)
-        confidence = self.model.score(features_scaled, prediction)
-        
+        predictions, confidence = self.predict_rows(features)
+
         return {
-            'predicted_surplus': max(0, prediction[0]),
-            'confidence': confidence,
-            'recommendation': self._generate_recommendation(prediction[0])
+            'predicted_surplus': float(predictions[0]),
+            'confidence': float(confidence[0]),
+            'recommendation': self._generate_recommendation(predictions[0])
         }
-    
+
     def _generate_recommendation(self, surplus):
         if surplus > 50:
             return "High surplus expected. Consider reaching out to food banks early."
@@ -62,14 +161,3 @@ class SurplusPredictionModel:
             return "Moderate surplus expected. Normal posting recommended."
         else:
             return "Low surplus expected. Consider adjusting portions."
-
-# Usage in Flask API
-from api.models.surplus_prediction import SurplusPredictionModel
-
-predictor = SurplusPredictionModel()
-
-@app.route('/predict-surplus', methods=['POST'])
-def predict_surplus():
-    data = request.json
-    prediction = predictor.predict_surplus(data)
-    return jsonify(prediction)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import re
+
+CATEGORY_KEYWORDS = {
+    'meals': ['meal', 'dinner', 'lunch', 'breakfast', 'dish', 'prepared'],
+    'bakery': ['bread', 'cake', 'pastry', 'cookie', 'muffin', 'croissant'],
+    'produce': ['fruit', 'vegetable', 'apple', 'banana', 'carrot', 'lettuce', 'tomato'],
+    'dairy': ['milk', 'cheese', 'yogurt', 'butter', 'cream'],
+    'beverages': ['juice', 'soda', 'water', 'coffee', 'tea'],
+    'snacks': ['chips', 'crackers', 'nuts', 'candy']
+}
+FRESH_INDICATORS = ['fresh', 'new', 'just made', 'today', 'crisp']
+OLD_INDICATORS = ['day old', 'yesterday', 'leftover', 'excess']
+POSITIVE_WORDS = ['fresh', 'delicious', 'quality', 'excellent', 'perfect', 'good']
+NEGATIVE_WORDS = ['old', 'stale', 'expired', 'bad', 'poor']
+
+# Keyword lists are grouped so one scan of the text serves every helper
+KEYWORD_GROUPS = {f'category:{category}': keywords for category, keywords in CATEGORY_KEYWORDS.items()}
+KEYWORD_GROUPS.update({
+    'fresh': FRESH_INDICATORS,
+    'old': OLD_INDICATORS,
+    'positive': POSITIVE_WORDS,
+    'negative': NEGATIVE_WORDS
+})
+
+
+def _word_forms(keyword):
+    """The keyword plus its plural forms ('cookie' -> 'cookies', 'candy' -> 'candies')"""
+    forms = [keyword, keyword + 's', keyword + 'es']
+    if keyword.endswith('y'):
+        forms.append(keyword[:-1] + 'ies')
+    return forms
+
+
+ALL_KEYWORDS = sorted({keyword for keywords in KEYWORD_GROUPS.values() for keyword in keywords})
+
+# Single-word keywords are looked up per distinct whitespace-separated chunk
+# (most chunks are already whole words, so only ones with punctuation go
+# through a regex). Two-word keywords are looked up at each occurrence of
+# their first word. Both stay linear in the text, where an alternation regex
+# of every form would retry all of them at each position.
+WORD_PATTERN = re.compile(r'\w+')
+PAIR_PATTERN = re.compile(r'(?<!\w)(\w+)\s+(\w+)')
+
+def _build_keyword_index():
+    """Each form -> its keyword plus the keywords it contains as whole words ("day old" -> "old")"""
+    index = {}
+    for keyword in ALL_KEYWORDS:
+        words = set(keyword.split())
+        contained = frozenset(
+            other for other in ALL_KEYWORDS
+            if other == keyword or words & set(_word_forms(other))
+        )
+        for form in _word_forms(keyword):
+            index[form] = contained
+    return index
+
+
+KEYWORDS_BY_FORM = _build_keyword_index()
+WORD_FORMS = frozenset(form for form in KEYWORDS_BY_FORM if ' ' not in form)
+# Keywords are at most two words long
+PAIR_STARTS = frozenset(form.split()[0] for form in KEYWORDS_BY_FORM if ' ' in form)
+
+
+def find_keywords(description):
+    """Set of keywords that appear as whole words in the description"""
+    text = description.lower()
+    found = set()
+    for chunk in set(text.split()):
+        for word in (chunk,) if chunk.isalnum() else WORD_PATTERN.findall(chunk):
+            if word in WORD_FORMS:
+                found |= KEYWORDS_BY_FORM[word]
+
+    for first in PAIR_STARTS:
+        position = text.find(first)
+        while position >= 0:
+            match = PAIR_PATTERN.match(text, position)
+            if match and match.group(1) == first:
+                found |= KEYWORDS_BY_FORM.get(f'{first} {match.group(2)}', frozenset())
+            position = text.find(first, position + 1)
+    return found
+
+
+def count_keywords(found, group):
+    return sum(1 for keyword in KEYWORD_GROUPS[group] if keyword in found)
+
+
+def categories_from_keywords(found):
+    categories = [
+        category for category in CATEGORY_KEYWORDS
+        if count_keywords(found, f'category:{category}')
+    ]
+    return categories if categories else ['other']
+
+
+def freshness_from_keywords(found):
+    fresh_score = count_keywords(found, 'fresh')
+    old_score = count_keywords(found, 'old')
+
+    if fresh_score > old_score:
+        return 'high'
+    elif old_score > fresh_score:
+        return 'medium'
+    else:
+        return 'unknown'
+
+
+def quality_from_keywords(found):
+    positive_count = count_keywords(found, 'positive')
+    negative_count = count_keywords(found, 'negative')
+
+    base_score = 0.7
+    score = base_score + (positive_count * 0.1) - (negative_count * 0.2)
+
+    return max(0, min(1, score))
+
+
+def analyze_text(description):
+    """Categories, freshness and quality score from a single scan of the text"""
+    found = find_keywords(description)
+    return {
+        'categories': categories_from_keywords(found),
+        'freshness': freshness_from_keywords(found),
+        'quality_score': quality_from_keywords(found)
+    }
@@ -0,0 +1,46 @@
+"""Fire concurrent requests at a running AI service and report throughput
+
+Usage (from ai-service/):
+    python -m scripts.concurrency_probe --url http://127.0.0.1:5001 --requests 100 --concurrency 50
+
+Each surplus request uses its own location and each sentiment request its
+own description, so the weather and analysis caches do not hide upstream
+latency.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def probe(url, index):
+    if index % 2:
+        response = requests.post(f"{url}/api/predict/surplus", json={
+            'business_id': index, 'lat': 10 + index * 0.5, 'lng': 20 + index * 0.5
+        }, timeout=60)
+    else:
+        response = requests.post(f"{url}/api/analyze/sentiment", json={
+            'description': f"fresh bread batch {index}"
+        }, timeout=60)
+    return response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5001')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = list(pool.map(lambda index: probe(args.url, index), range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {elapsed:.2f}s "
+          f"({args.requests / elapsed:.1f} req/s), non-200: {sum(status != 200 for status in statuses)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Local stand-ins for OpenWeatherMap and Hugging Face with injected latency
+
+Usage (from ai-service/):
+    python -m scripts.stub_upstreams --port 5050 --latency 0.5
+
+Then point the service at it:
+    WEATHER_BASE_URL=http://127.0.0.1:5050/data/2.5/weather
+    WEATHER_FORECAST_URL=http://127.0.0.1:5050/data/2.5/forecast
+    HF_SENTIMENT_URL=http://127.0.0.1:5050/models/sentiment
+    OPENWEATHER_API_KEY=stub
+"""
+import argparse
+import time
+
+from flask import Flask, request, jsonify
+
+
+def create_stub_app(latency):
+    stub = Flask(__name__)
+
+    @stub.route('/data/2.5/weather', methods=['GET'])
+    def weather():
+        time.sleep(latency)
+        return jsonify({
+            'main': {'temp': 18.5},
+            'weather': [{'id': 801, 'description': 'few clouds'}],
+            'rain': {}
+        })
+
+    @stub.route('/data/2.5/forecast', methods=['GET'])
+    def forecast():
+        # 5 days in 3-hour slots, like the real endpoint
+        time.sleep(latency)
+        start = int(time.time()) // 10800 * 10800
+        return jsonify({'list': [{
+            'dt': start + slot * 10800,
+            'main': {'temp': 14 + slot % 8},
+            'weather': [{'id': 500 if slot % 5 == 0 else 801}],
+            'rain': {'3h': 1.2} if slot % 5 == 0 else {}
+        } for slot in range(40)]})
+
+    @stub.route('/models/<path:model>', methods=['POST'])
+    def sentiment(model):
+        time.sleep(latency)
+        inputs = request.json.get('inputs')
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        return jsonify([
+            [{'label': 'positive', 'score': 0.8}, {'label': 'neutral', 'score': 0.15}, {'label': 'negative', 'score': 0.05}]
+            for _ in texts
+        ])
+
+    return stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds to wait before each response')
+    args = parser.parse_args()
+
+    create_stub_app(args.latency).run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
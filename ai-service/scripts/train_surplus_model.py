@@ -0,0 +1,37 @@
+"""Train the surplus prediction model from a history file
+
+Usage (from ai-service/):
+    python -m scripts.train_surplus_model history.csv [--output PATH]
+
+The history needs a `timestamp` and `surplus_kg` column per observation,
+plus any of: category, temperature, weather_code, event_score,
+historical_avg_surplus, has_promotion, is_holiday. historical_avg_surplus
+is the business's average surplus in kg, as sent to /api/predict/surplus.
+"""
+import argparse
+import os
+
+from models.surplus_prediction import SurplusPredictionModel, load_history
+
+DEFAULT_OUTPUT = os.path.join('models', 'artifacts', 'surplus_model.joblib')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('history', help='CSV or Parquet file of past surplus observations')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'artifact path (default {DEFAULT_OUTPUT})')
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    predictor = SurplusPredictionModel()
+    metrics = predictor.train(history)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    predictor.save(args.output)
+
+    print(f"Trained on {metrics['rows']} rows in {metrics['fit_seconds']}s (train R² {metrics['train_r2']})")
+    print(f"Saved model to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
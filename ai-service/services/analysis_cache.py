@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from services.cache import TTLCache
+from services.metrics import record_cache_lookup
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Case- and whitespace-insensitive form of a description"""
+    return WHITESPACE.sub(' ', text).strip().lower()
+
+
+def content_key(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class SqliteStore:
+    """On-disk key/value store so cached results survive worker restarts"""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._connection = None
+        self._connection_pid = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # SQLite connections must not be shared across a fork
+        if self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT value FROM analysis_cache WHERE key = ? AND stored_at > ?',
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO analysis_cache (key, value, stored_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), time.time())
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(connection)
+
+    def _prune(self, connection):
+        connection.execute('DELETE FROM analysis_cache WHERE stored_at <= ?', (time.time() - self.ttl,))
+        connection.execute(
+            'DELETE FROM analysis_cache WHERE key NOT IN '
+            '(SELECT key FROM analysis_cache ORDER BY stored_at DESC LIMIT ?)',
+            (self.max_entries,)
+        )
+
+
+class AnalysisCache:
+    """Description analysis results memoized by normalized-text hash"""
+
+    def __init__(self, max_entries=4096, ttl=86400, path=None):
+        self._memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._disk = SqliteStore(path, max_entries, ttl) if path else None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        key = content_key(text)
+        value = self._memory.get(key)
+
+        if value is None and self._disk:
+            value = self._disk.get(key)
+            if value is not None:
+                self._memory.set(key, value)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        record_cache_lookup('analysis', value is not None)
+        return value
+
+    def set(self, text, value):
+        key = content_key(text)
+        self._memory.set(key, value)
+        if self._disk:
+            self._disk.set(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._memory),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'persistent': self._disk is not None
+        }
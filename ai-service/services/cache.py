@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+from services.metrics import record_cache_lookup
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a TTL (seconds)
+
+    A cache given a `name` also reports its hits and misses as metrics.
+    """
+
+    def __init__(self, max_entries=1024, ttl=600, clock=time.monotonic, name=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_with_age(self, key):
+        """Return (value, age in seconds) for a live entry, or None"""
+        entry = self._lookup(key)
+        if self.name:
+            record_cache_lookup(self.name, entry is not None)
+        return entry
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age >= self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, age
+
+    def get(self, key, default=None):
+        entry = self.get_with_age(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
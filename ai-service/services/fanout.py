@@ -0,0 +1,62 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class Lookup:
+    """One enrichment call for fan_out: function(*args), or `default` if it fails or is late"""
+
+    def __init__(self, function, *args, default=None, timeout=None):
+        self.function = function
+        self.args = args
+        self.default = default
+        self.timeout = timeout
+
+
+def _get_executor():
+    # Worker threads do not survive a fork, so each process builds its own pool
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('FANOUT_MAX_WORKERS', 16)),
+                    thread_name_prefix='fanout'
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def fan_out(lookups, deadline):
+    """Run named lookups concurrently and return {name: result}
+
+    Every lookup must finish within its own timeout and within `deadline`
+    seconds overall. A lookup that raises or runs late gets its default, so
+    the caller's latency is bounded by the slowest lookup or the deadline.
+    """
+    started = time.monotonic()
+    executor = _get_executor()
+    futures = {name: executor.submit(lookup.function, *lookup.args) for name, lookup in lookups.items()}
+
+    results = {}
+    for name, future in futures.items():
+        lookup = lookups[name]
+        budget = deadline if lookup.timeout is None else min(deadline, lookup.timeout)
+        try:
+            results[name] = future.result(timeout=max(0, started + budget - time.monotonic()))
+        except TimeoutError:
+            future.cancel()
+            logger.warning(f"Lookup {name} missed its {budget:.2f}s deadline, using default")
+            results[name] = lookup.default
+        except Exception as e:
+            logger.error(f"Lookup {name} failed, using default: {str(e)}")
+            results[name] = lookup.default
+    return results
@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import record_upstream_error
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `reset_timeout` seconds. Then a single trial call
+    is let through: success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+class OutboundClient:
+    """Keep-alive connection pool for one upstream, with retries and a circuit breaker
+
+    Only failures that are safe and cheap to repeat are retried: connection
+    errors (nothing reached the upstream) and 429/503 answers. Read timeouts
+    are not, since a slow upstream would only be waited on again. Every
+    call, retries and backoff included, finishes within `deadline` seconds,
+    which must stay below the gunicorn worker timeout.
+    """
+
+    RETRY_STATUSES = (429, 503)
+    FAILURE_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, name, timeout=5, pool_size=10, retries=2, backoff=0.3,
+                 failure_threshold=5, reset_timeout=30, deadline=20, clock=time.monotonic):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.clock = clock
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock=clock)
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if not self.breaker.allow():
+            record_upstream_error(self.name, 'circuit_open')
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        timeout = kwargs.pop('timeout', self.timeout)
+        started = self.clock()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (self.clock() - started)
+            try:
+                response = self.session.request(method, url, timeout=min(timeout, remaining), **kwargs)
+                retryable = response.status_code in self.RETRY_STATUSES
+            except requests.ConnectionError as e:
+                response, retryable, error = None, True, e
+            except requests.RequestException as e:
+                response, retryable, error = None, False, e
+
+            delay = self.backoff * (2 ** attempt)
+            if not retryable or attempt >= self.retries or self.clock() - started + delay >= self.deadline:
+                break
+            time.sleep(delay)
+            attempt += 1
+
+        if response is None:
+            record_upstream_error(self.name, type(error).__name__)
+            self.breaker.record_failure()
+            raise error
+
+        if response.status_code in self.FAILURE_STATUSES:
+            record_upstream_error(self.name, f'http_{response.status_code}')
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+def create_client(name, timeout):
+    """Build an OutboundClient configured from HTTP_* environment variables"""
+    return OutboundClient(
+        name,
+        timeout=timeout,
+        pool_size=int(os.getenv('HTTP_POOL_SIZE', 10)),
+        retries=int(os.getenv('HTTP_RETRIES', 2)),
+        backoff=float(os.getenv('HTTP_RETRY_BACKOFF', 0.3)),
+        failure_threshold=int(os.getenv('HTTP_BREAKER_THRESHOLD', 5)),
+        reset_timeout=float(os.getenv('HTTP_BREAKER_RESET', 30)),
+        deadline=float(os.getenv('HTTP_DEADLINE', 20))
+    )
@@ -0,0 +1,72 @@
+"""Prometheus metrics for request, stage, cache and upstream observability
+
+When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) every gunicorn
+worker writes its samples there and /api/metrics aggregates all workers.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+REQUEST_LATENCY = Histogram(
+    'foodbridge_request_latency_seconds', 'Request latency by route',
+    ['route', 'method', 'status']
+)
+STAGE_LATENCY = Histogram(
+    'foodbridge_stage_latency_seconds', 'Latency of internal processing stages',
+    ['stage']
+)
+CACHE_HITS = Counter('foodbridge_cache_hits_total', 'Cache hits', ['cache'])
+CACHE_MISSES = Counter('foodbridge_cache_misses_total', 'Cache misses', ['cache'])
+UPSTREAM_ERRORS = Counter(
+    'foodbridge_upstream_errors_total', 'Failed or refused upstream calls',
+    ['upstream', 'reason']
+)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Observe the duration of a block in the stage latency histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - started)
+
+
+def record_cache_lookup(cache, hit):
+    (CACHE_HITS if hit else CACHE_MISSES).labels(cache).inc()
+
+
+def record_upstream_error(upstream, reason):
+    UPSTREAM_ERRORS.labels(upstream, reason).inc()
+
+
+def init_metrics(app):
+    """Time every request and serve the metrics at /api/metrics"""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(route, request.method, response.status_code).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        registry = REGISTRY
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,126 @@
+"""Opt-in cProfile capture for individual production requests
+
+Nothing is registered unless PROFILING_ENABLED is true, so a disabled
+profiler adds no per-request work. When enabled, a request is profiled if
+it sends `X-Profile: <token>` (or `?profile=<token>`) matching
+PROFILING_ADMIN_TOKEN, or at random with probability
+PROFILING_SAMPLE_RATE. Without a token only sampling profiles requests. Profiles are pstats files kept in a
+ring buffer of the newest PROFILING_MAX_FILES in PROFILING_DIR, and are
+listed and downloaded through /api/admin/profiles with the
+`X-Admin-Token` header.
+
+A profiler hooks the whole interpreter, not one request. Only one request
+per worker process is profiled at a time; requests that arrive while a
+profile is running are served unprofiled. Under gevent, where a worker's
+concurrent requests share one OS thread, the profile of a request also
+includes whatever other greenlets ran while it was waiting.
+"""
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import abort, g, jsonify, request, send_from_directory
+
+UNSAFE_CHARACTERS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class ProfileStore:
+    """Directory of profile files that keeps only the newest `max_files`"""
+
+    def __init__(self, directory, max_files=50):
+        self.directory = directory
+        self.max_files = max_files
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, profiler, route, elapsed_ms):
+        name = UNSAFE_CHARACTERS.sub('_', f"{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{route}-{elapsed_ms:.0f}ms")
+        profiler.dump_stats(os.path.join(self.directory, f"{name.strip('_')}.prof"))
+        self._trim()
+
+    def _trim(self):
+        for name in self.list()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # Another worker trimmed it first
+
+    def list(self):
+        """Profile file names, newest first"""
+        return sorted((name for name in os.listdir(self.directory) if name.endswith('.prof')), reverse=True)
+
+
+def init_profiling(app):
+    if os.getenv('PROFILING_ENABLED', 'false').lower() != 'true':
+        return None
+
+    token = os.getenv('PROFILING_ADMIN_TOKEN')
+    sample_rate = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+    store = ProfileStore(
+        os.getenv('PROFILING_DIR', 'profiles'),
+        max_files=int(os.getenv('PROFILING_MAX_FILES', 50))
+    )
+
+    def is_requested():
+        if not token:
+            return False
+        return (request.headers.get('X-Profile') or request.args.get('profile')) == token
+
+    # Held by the request being profiled in this process
+    active = threading.Lock()
+
+    @app.before_request
+    def start_profiler():
+        if request.path.startswith('/api/admin/profiles'):
+            return
+        if not (is_requested() or (sample_rate and random.random() < sample_rate)):
+            return
+        if not active.acquire(blocking=False):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool already holds the interpreter hook
+            active.release()
+            return
+        g.profiler = profiler
+        g.profile_started = time.perf_counter()
+
+    @app.after_request
+    def save_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            active.release()
+            elapsed_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            store.save(profiler, route, elapsed_ms)
+        return response
+
+    @app.teardown_request
+    def stop_profiler(error):
+        # after_request is skipped when a request fails with an unhandled error
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            active.release()
+
+    def require_admin():
+        if not token or request.headers.get('X-Admin-Token') != token:
+            abort(403)
+
+    @app.route('/api/admin/profiles', methods=['GET'])
+    def list_profiles():
+        require_admin()
+        return jsonify({'profiles': store.list()})
+
+    @app.route('/api/admin/profiles/<name>', methods=['GET'])
+    def download_profile(name):
+        require_admin()
+        return send_from_directory(os.path.abspath(store.directory), name, as_attachment=True)
+
+    return store
@@ -0,0 +1,112 @@
+"""JSON and MessagePack encoding for request and response bodies
+
+With msgspec installed, Flask's JSON provider encodes and decodes with
+msgspec, routes can decode bodies straight into typed schemas
+(models/schemas.py), and internal callers may send or ask for MessagePack
+(Content-Type / Accept: application/msgpack). Without it everything falls
+back to the stdlib json module.
+"""
+import json
+
+from flask import Request, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = {MSGPACK_MIMETYPE, 'application/x-msgpack'}
+
+if msgspec is not None:
+    # Sorted keys keep responses byte-for-byte stable like Flask's default
+    _json_encoder = msgspec.json.Encoder(enc_hook=DefaultJSONProvider.default, order='sorted')
+    _json_decoder = msgspec.json.Decoder()
+    _msgpack_encoder = msgspec.msgpack.Encoder(enc_hook=DefaultJSONProvider.default)
+    _typed_decoders = {}
+    BodyDecodeError = msgspec.DecodeError
+else:
+    BodyDecodeError = ValueError
+
+
+def encode_json(obj):
+    """Compact JSON as bytes"""
+    if msgspec is not None:
+        return _json_encoder.encode(obj)
+    return json.dumps(obj, default=DefaultJSONProvider.default, separators=(',', ':')).encode()
+
+
+def decode_json(data):
+    if msgspec is not None:
+        return _json_decoder.decode(data)
+    return json.loads(data)
+
+
+def to_builtins(obj):
+    """Plain dicts and lists for a decoded schema (other objects are returned as is)"""
+    if msgspec is not None and isinstance(obj, msgspec.Struct):
+        return msgspec.to_builtins(obj)
+    return obj
+
+
+def wants_msgpack():
+    if msgspec is None or not has_request_context():
+        return False
+    return request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+
+def decode_body(schema):
+    """The request body decoded into a schema, or None when msgspec is unavailable
+
+    Raises BodyDecodeError for malformed bodies or ones that do not match
+    the schema.
+    """
+    if msgspec is None or schema is None:
+        return None
+
+    decoders = _typed_decoders.get(schema)
+    if decoders is None:
+        decoders = _typed_decoders[schema] = (msgspec.json.Decoder(schema), msgspec.msgpack.Decoder(schema))
+
+    json_decoder, msgpack_decoder = decoders
+    if request.mimetype in MSGPACK_MIMETYPES:
+        return msgpack_decoder.decode(request.get_data())
+    return json_decoder.decode(request.get_data())
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider backed by msgspec that answers in MessagePack when asked"""
+
+    def dumps(self, obj, **kwargs):
+        return encode_json(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return decode_json(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if wants_msgpack():
+            return self._app.response_class(_msgpack_encoder.encode(obj), mimetype=MSGPACK_MIMETYPE)
+        return self._app.response_class(encode_json(obj) + b'\n', mimetype=self.mimetype)
+
+
+class ServiceRequest(Request):
+    """Request whose get_json() (and .json) also accepts MessagePack bodies"""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if msgspec is not None and self.mimetype in MSGPACK_MIMETYPES:
+            try:
+                return msgspec.msgpack.decode(self.get_data(cache=cache))
+            except msgspec.DecodeError as e:
+                if silent:
+                    return None
+                return self.on_json_loading_failed(e)
+        return super().get_json(force=force, silent=silent, cache=cache)
+
+
+def init_serialization(app):
+    """Install the msgspec JSON provider and MessagePack-aware requests when available"""
+    app.request_class = ServiceRequest
+    if msgspec is not None:
+        app.json = FastJSONProvider(app)
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherCache:
+    """Weather lookups cached per rounded lat/lng cell
+
+    Fresh entries are served for `ttl` seconds. For a further `stale_ttl`
+    seconds the old value is still served while one background fetch
+    refreshes it. Concurrent misses for the same cell share a single fetch.
+    `fetch(lat, lng)` does the upstream call and returns None on failure.
+    Cache metrics are reported under `name`.
+    """
+
+    def __init__(self, fetch, precision=1, ttl=600, stale_ttl=1800, max_entries=1024, name='weather',
+                 clock=time.monotonic):
+        self.fetch = fetch
+        self.precision = precision
+        self.ttl = ttl
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl + stale_ttl, clock=clock, name=name)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def cell(self, lat, lng):
+        """Cache key for a location: coordinates rounded to `precision` decimals"""
+        return round(float(lat), self.precision), round(float(lng), self.precision)
+
+    def get(self, lat, lng):
+        key = self.cell(lat, lng)
+        entry = self._cache.get_with_age(key)
+
+        if entry is None:
+            return self._fetch_once(key)
+
+        value, age = entry
+        if age >= self.ttl:
+            self._refresh_in_background(key)
+        return value
+
+    def stats(self):
+        return self._cache.stats()
+
+    def clear(self):
+        self._cache.clear()
+
+    def _fetch_once(self, key):
+        """Fetch a cell, or wait for a fetch of the same cell already running"""
+        with self._lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            value = self.fetch(*key)
+            if value is not None:
+                self._cache.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _refresh_in_background(self, key):
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            try:
+                self._fetch_once(key)
+            except Exception as e:
+                logger.error(f"Weather cache refresh error: {str(e)}")
+
+        threading.Thread(target=refresh, daemon=True).start()
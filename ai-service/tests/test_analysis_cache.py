@@ -0,0 +1,86 @@
+"""Description analysis cache and the routes that use it"""
+import sqlite3
+
+import pytest
+
+import app
+from services.analysis_cache import AnalysisCache, SqliteStore, content_key
+
+ANALYSIS = {'sentiment': [[{'label': 'POSITIVE', 'score': 0.9}]], 'categories': ['bakery'],
+            'freshness': 'fresh', 'quality_score': 0.8}
+
+
+def test_keys_ignore_case_and_whitespace():
+    assert content_key('Fresh  bread\n today ') == content_key('fresh bread today')
+    assert content_key('fresh bread') != content_key('fresh breads')
+
+
+def test_hits_misses_and_stats():
+    cache = AnalysisCache()
+    assert cache.get('Fresh bread') is None
+    cache.set('Fresh bread', ANALYSIS)
+    assert cache.get('  fresh BREAD') == ANALYSIS
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'persistent': False}
+
+
+def test_disk_copy_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'analysis.sqlite')
+    AnalysisCache(path=path).set('Fresh bread', ANALYSIS)
+    restarted = AnalysisCache(path=path)
+    assert restarted.get('fresh bread') == ANALYSIS
+    assert restarted.stats()['persistent']
+
+
+def test_disk_entries_expire(tmp_path):
+    path = str(tmp_path / 'analysis.sqlite')
+    AnalysisCache(ttl=0, path=path).set('Fresh bread', ANALYSIS)
+    assert AnalysisCache(ttl=0, path=path).get('fresh bread') is None
+
+
+def test_disk_store_is_pruned_to_max_entries(tmp_path):
+    path = str(tmp_path / 'analysis.sqlite')
+    store = SqliteStore(path, max_entries=10, ttl=3600)
+    for i in range(SqliteStore.PRUNE_EVERY):
+        store.set(f'key-{i}', i)
+    count, = sqlite3.connect(path).execute('SELECT COUNT(*) FROM analysis_cache').fetchone()
+    assert count == 10
+    assert store.get(f'key-{SqliteStore.PRUNE_EVERY - 1}') == SqliteStore.PRUNE_EVERY - 1
+
+
+@pytest.fixture
+def sentiment(monkeypatch):
+    """Count Hugging Face calls; `sentiment.result` is what they return"""
+    class Sentiment:
+        calls = 0
+        result = ANALYSIS['sentiment'][0]
+
+    def query(texts):
+        Sentiment.calls += 1
+        return [Sentiment.result for _ in texts]
+
+    monkeypatch.setattr(app, 'analysis_cache', AnalysisCache())
+    monkeypatch.setattr(app, 'sentiment_batcher', None)
+    monkeypatch.setattr(app, 'query_hugging_face_sentiment_batch', query)
+    return Sentiment
+
+
+def test_repeated_descriptions_are_served_from_the_cache(sentiment):
+    client = app.app.test_client()
+    first = client.post('/api/analyze/sentiment', json={'description': 'Fresh bread from today'}).get_json()
+    second = client.post('/api/analyze/sentiment', json={'description': 'fresh  BREAD from today'}).get_json()
+    assert first == second
+    assert sentiment.calls == 1
+
+    batch = client.post('/api/analyze/sentiment/batch',
+                        json={'descriptions': ['Fresh bread from today', 'Day old pastries', 'day old PASTRIES']})
+    results = batch.get_json()['results']
+    assert results[0] == first and results[1] == results[2]
+    assert sentiment.calls == 2
+
+
+def test_fallback_sentiment_is_not_cached(sentiment):
+    sentiment.result = list(app.DEFAULT_SENTIMENT)
+    client = app.app.test_client()
+    client.post('/api/analyze/sentiment', json={'description': 'Fresh bread'})
+    client.post('/api/analyze/sentiment', json={'description': 'Fresh bread'})
+    assert sentiment.calls == 2
@@ -0,0 +1,96 @@
+"""Capacity-aware batch assignment"""
+import random
+from collections import defaultdict
+
+import numpy as np
+
+import app
+from benchmarks import datagen
+from models.batch_assignment import CAPACITY_ALLOWANCE, assign_batch
+from models.match_engine import MATCH_THRESHOLD
+from models.recipient_store import RecipientStore
+
+
+def food_item(item_id, quantity, lng=36.82, lat=-1.29):
+    return {'_id': item_id, 'quantity': {'value': quantity, 'unit': 'kg'},
+            'location': {'type': 'Point', 'coordinates': [lng, lat]}}
+
+
+def recipient(recipient_id, capacity, lng=36.82, lat=-1.29):
+    return {'_id': recipient_id, 'name': recipient_id,
+            'profile': {'location': {'type': 'Point', 'coordinates': [lng, lat]}, 'servingCapacity': capacity}}
+
+
+def assign(food_items, recipients, urgency=0.8, **options):
+    store = RecipientStore.from_recipients(recipients)
+    return assign_batch(food_items, store, store.rows(), np.full(len(food_items), urgency), **options)
+
+
+def test_random_batches_never_overfill_recipients():
+    rng = random.Random(3)
+    recipients = datagen.make_recipients(60, spread_deg=0.3)
+    capacities = {r['_id']: r['profile']['servingCapacity'] for r in recipients}
+    food_items = [food_item(f'food-{i}', rng.choice([2, 8, 15, 40, 120]),
+                            datagen.CENTER_LNG + rng.uniform(-0.3, 0.3), datagen.CENTER_LAT + rng.uniform(-0.3, 0.3))
+                  for i in range(400)]
+
+    result = assign(food_items, recipients, top_k=3)
+    received = defaultdict(float)
+    for assignment in result['assignments']:
+        received[assignment['recipient_id']] += assignment['quantity']
+        assert assignment['score'] > MATCH_THRESHOLD
+    assert all(total <= capacities[recipient_id] * CAPACITY_ALLOWANCE for recipient_id, total in received.items())
+
+    placed = [entry['item_index'] for entry in result['assignments']]
+    unplaced = [entry['item_index'] for entry in result['unassigned']]
+    assert sorted(placed + unplaced) == list(range(len(food_items)))
+    assert result['complete']
+
+
+def test_items_beyond_capacity_are_reported():
+    result = assign([food_item(f'food-{i}', 8) for i in range(3)], [recipient('only', 10)])
+    assert [entry['food_item_id'] for entry in result['assignments']] == ['food-0']
+    assert [entry['reason'] for entry in result['unassigned']] == ['capacity', 'capacity']
+
+
+def test_items_overflow_to_recipients_outside_their_top_k():
+    # Both items prefer the nearby recipient, which only has room for one
+    recipients = [recipient('near', 10), recipient('farther', 10, lng=36.9)]
+    result = assign([food_item('a', 10), food_item('b', 10)], recipients, top_k=1)
+    assert [(entry['food_item_id'], entry['recipient_id']) for entry in result['assignments']] == [
+        ('a', 'near'), ('b', 'farther')
+    ]
+
+
+def test_recipients_without_capacity_get_nothing():
+    result = assign([food_item('a', 1)], [recipient('closed', 0), recipient('negative', -5)])
+    assert result['assignments'] == []
+    assert result['unassigned'][0]['reason'] == 'capacity'
+
+
+def test_items_scoring_below_the_threshold_have_no_match():
+    # Out of range, low urgency and far too much food for the recipient
+    result = assign([food_item('far', 500, lng=10, lat=10)], [recipient('r', 50)], urgency=0.4)
+    assert result['unassigned'] == [{'item_index': 0, 'food_item_id': 'far', 'reason': 'no_match'}]
+
+
+def test_time_budget_leaves_items_unassigned():
+    ticks = iter(range(100))
+    store = RecipientStore.from_recipients([recipient('r', 500)])
+    result = assign_batch([food_item(f'food-{i}', 1) for i in range(3)], store, store.rows(), np.full(3, 0.8),
+                          time_budget=0.5, clock=lambda: next(ticks))
+    assert not result['complete']
+    assert {entry['reason'] for entry in result['unassigned']} == {'time_budget'}
+
+
+def test_match_batch_route():
+    client = app.app.test_client()
+    response = client.post('/api/match/batch', json={
+        'food_items': [food_item('a', 8), food_item('b', 8)],
+        'recipients': [recipient('r', 10)]
+    })
+    result = response.get_json()
+    assert response.status_code == 200
+    assert len(result['assignments']) == 1 and result['unassigned'][0]['reason'] == 'capacity'
+
+    assert client.post('/api/match/batch', json={'food_items': []}).status_code == 400
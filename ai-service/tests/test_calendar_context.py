@@ -0,0 +1,51 @@
+"""Region holidays, extra dates and the per-day feature tables"""
+from datetime import date, datetime
+
+import pytest
+
+from models.calendar_context import CalendarContext, HolidayCalendar, easter_sunday, parse_extra_dates
+
+
+def test_easter_sunday():
+    assert easter_sunday(2024) == date(2024, 3, 31)
+    assert easter_sunday(2025) == date(2025, 4, 20)
+
+
+@pytest.mark.parametrize('region, day', [
+    ('US', date(2025, 11, 27)),  # fourth Thursday of November
+    ('US', date(2025, 5, 26)),   # last Monday of May
+    ('US', date(2025, 7, 4)),
+    ('KE', date(2025, 4, 18)),   # Good Friday
+    ('KE', date(2025, 4, 21)),   # Easter Monday
+    ('KE', date(2024, 10, 21)),  # Mashujaa Day on a Sunday, observed on Monday
+    ('GB', date(2025, 8, 25)),   # last Monday of August
+])
+def test_region_holidays(region, day):
+    assert HolidayCalendar(region).is_holiday(day)
+
+
+def test_ordinary_days_and_other_regions():
+    assert not HolidayCalendar('US').is_holiday(date(2025, 4, 21))
+    assert not HolidayCalendar('KE').is_holiday(date(2025, 11, 27))
+    with pytest.raises(ValueError):
+        HolidayCalendar('XX')
+
+
+def test_parse_extra_dates():
+    assert parse_extra_dates('12-24, 2025-03-31,,') == [(12, 24), date(2025, 3, 31)]
+    assert parse_extra_dates(None) == []
+
+
+def test_invalid_extra_dates_are_skipped():
+    assert parse_extra_dates('02-30,13-01,2025-02-29,xmas,1-2-3-4,06-15') == [(6, 15)]
+
+
+def test_yearly_february_29_only_in_leap_years():
+    calendar = HolidayCalendar('US', parse_extra_dates('02-29,2025-03-31'))
+    assert calendar.is_holiday(date(2024, 2, 29))
+    assert not calendar.is_holiday(date(2025, 2, 28))
+    assert calendar.is_holiday(date(2025, 3, 31))
+    assert not calendar.is_holiday(date(2026, 3, 31))
+
+    context = CalendarContext(calendar)
+    assert context.features_at(datetime(2025, 3, 1, 12))['is_holiday'] is False
@@ -0,0 +1,140 @@
+"""The vectorized scoring paths give exactly the results of the scalar code
+
+Run from ai-service/ with `python -m pytest` (pytest is a development
+dependency only, not in requirements.txt).
+"""
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import app
+from benchmarks import datagen
+from models.match_engine import (
+    MATCH_THRESHOLD, pack_typed_recipients, score_recipients, store_top_matches, stream_top_matches
+)
+from models.recipient_store import RecipientStore
+from models.schemas import Recipient
+
+CAPACITIES = [0, -1, 5, 10, 50, 300, 1000, None]
+
+
+def make_recipients(seed, count=300):
+    """datagen recipients plus the capacities calculate_capacity_score special-cases"""
+    rng = random.Random(seed)
+    recipients = datagen.make_recipients(count, seed=seed, spread_deg=0.3 + seed * 0.1)
+    for recipient in recipients:
+        capacity = rng.choice(CAPACITIES)
+        if capacity is None:
+            del recipient['profile']['servingCapacity']
+        else:
+            recipient['profile']['servingCapacity'] = capacity
+    return recipients
+
+
+def scalar_top_matches(food_item, recipients, limit=5):
+    scored = [(app.calculate_match_score(food_item, recipient), recipient) for recipient in recipients]
+    matches = [(score, recipient) for score, recipient in scored if score['overall_score'] > MATCH_THRESHOLD]
+    matches.sort(key=lambda match: match[0]['overall_score'], reverse=True)
+    return [(recipient['_id'], score['overall_score']) for score, recipient in matches[:limit]], len(matches)
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('hours', [1, 4, 12, 48])
+def test_score_recipients_matches_calculate_match_score(seed, hours):
+    food_item = datagen.make_food_item(seed, hours_to_expiry=hours)
+    recipients = make_recipients(seed)
+    urgency = app.calculate_urgency_score(food_item)
+
+    scores = score_recipients(food_item, recipients, urgency)
+    for i, recipient in enumerate(recipients):
+        expected = app.calculate_match_score(food_item, recipient)
+        assert round(float(scores['overall'][i]), 3) == expected['overall_score']
+        assert round(float(scores['distance_km'][i]), 1) == expected['distance_km']
+        assert round(float(scores['capacity'][i]), 2) == expected['capacity_score']
+        assert round(float(scores['preference'][i]), 2) == expected['preference_score']
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_top_matches_match_scalar_ranking(seed):
+    food_item = datagen.make_food_item(seed, hours_to_expiry=3)
+    recipients = make_recipients(seed)
+    urgency = app.calculate_urgency_score(food_item)
+    expected, expected_total = scalar_top_matches(food_item, recipients)
+
+    matches, total = stream_top_matches(food_item, recipients, urgency, chunk_size=64)
+    assert [(match['recipient']['_id'], match['score']) for match in matches] == expected
+    assert total == expected_total
+
+    store = RecipientStore.from_recipients(recipients)
+    matches, total = store_top_matches(food_item, store, store.rows(), urgency)
+    assert [(match['recipient']['_id'], match['score']) for match in matches] == expected
+    assert total == expected_total
+
+
+@pytest.mark.skipif(Recipient is None, reason='msgspec is not installed')
+def test_typed_recipients_pack_like_dicts():
+    import msgspec
+
+    food_item = datagen.make_food_item(1)
+    recipients = make_recipients(1)
+    typed = msgspec.json.decode(msgspec.json.encode(recipients), type=list[Recipient])
+    urgency = app.calculate_urgency_score(food_item)
+
+    expected, _ = stream_top_matches(food_item, recipients, urgency)
+    matches, _ = stream_top_matches(food_item, typed, urgency, pack=pack_typed_recipients)
+    assert [match['score'] for match in matches] == [match['score'] for match in expected]
+
+
+def test_predict_area_demand_chunk_matches_predict_area_demand():
+    locations = datagen.make_demand_locations(2000)
+    locations[0] = {'name': 'defaults only'}
+    locations[1] = {'population_density': 0, 'poverty_rate': 0, 'food_access_score': 1}
+
+    assert app.predict_area_demand_chunk(locations) == [app.predict_area_demand(location) for location in locations]
+
+
+def make_surplus_features(seed):
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1) + timedelta(hours=rng.randrange(24 * 365))
+    business = {
+        'business_type': rng.choice(['restaurant', 'bakery', 'cafe', 'grocery', 'unknown']),
+        'historical_avg_surplus': rng.choice([0, -3, 5, 15.5, 33.3, 80]),
+        'event_score': rng.choice([0, 1, 2, 12]),
+        'has_promotion': rng.random() < 0.3
+    }
+    weather = rng.choice([None, {'temperature': rng.choice([-3, 4, 20, 36]), 'condition_code': 500,
+                                 'rain': rng.choice([0, 0, 1.2])}])
+    return app.prepare_prediction_features(business, weather, now=now)
+
+
+def test_calculate_surplus_predictions_matches_scalar():
+    features_list = [make_surplus_features(seed) for seed in range(2000)]
+
+    expected = [app.calculate_surplus_prediction(features) for features in features_list]
+    assert app.calculate_surplus_predictions(features_list) == expected
+
+
+def test_horizon_curve_matches_hourly_predictions():
+    start = datetime(2025, 3, 28, 6)
+    moments = [start + timedelta(hours=hour) for hour in range(72)]
+    slots = np.arange(25, dtype=float)
+    forecast = {
+        'times': start.timestamp() - 3600 + 10800 * slots,
+        'temperature': np.linspace(0, 40, slots.size),
+        'condition_code': np.full(slots.size, 500.0),
+        'rain': np.where(slots % 2 == 0, 1.0, 0.0)
+    }
+    business = {'business_type': 'restaurant', 'historical_avg_surplus': 12, 'event_score': 1}
+
+    curve = app.calculate_surplus_columns(app.build_horizon_columns(business, moments, forecast))
+    for moment, prediction in zip(moments, curve):
+        slot = max(int(np.searchsorted(forecast['times'], moment.timestamp(), side='right')) - 1, 0)
+        weather = {
+            'temperature': forecast['temperature'][slot].item(),
+            'condition_code': forecast['condition_code'][slot].item(),
+            'rain': forecast['rain'][slot].item()
+        }
+        expected = app.calculate_surplus_prediction(app.prepare_prediction_features(business, weather, now=moment))
+        assert prediction == expected
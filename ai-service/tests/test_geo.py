@@ -0,0 +1,43 @@
+"""Distance modes in models.geo"""
+import numpy as np
+import pytest
+
+from models.geo import GEOPY_AVAILABLE, distance_km, point_distance_km
+from models.matching_algorithm import SmartMatcher
+
+LNGS = np.array([-1.29, -1.0, 0.5, 36.8, 179.9])
+LATS = np.array([36.82, 37.2, 40.0, -1.29, 0.0])
+
+
+def test_fast_mode_stays_close_to_haversine():
+    haversine = distance_km(36.82, -1.29, LNGS, LATS)
+    fast = distance_km(36.82, -1.29, LNGS, LATS, mode='fast')
+    assert np.allclose(fast, haversine, rtol=1e-4)
+
+
+def test_haversine_matches_point_distance():
+    distances = distance_km(36.82, -1.29, LNGS, LATS)
+    for i in range(len(LNGS)):
+        assert distances[i] == pytest.approx(point_distance_km(36.82, -1.29, LNGS[i], LATS[i]))
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        distance_km(0, 0, LNGS, LATS, mode='manhattan')
+    with pytest.raises(ValueError):
+        SmartMatcher(distance_mode='manhattan')
+
+
+def test_exact_mode_without_geopy_fails_clearly(monkeypatch):
+    monkeypatch.setattr('models.geo.GEOPY_AVAILABLE', False)
+    monkeypatch.setattr('models.matching_algorithm.GEOPY_AVAILABLE', False)
+    with pytest.raises(ImportError, match='geopy'):
+        SmartMatcher(distance_mode='exact')
+    with pytest.raises(ImportError, match='geopy'):
+        distance_km(0, 0, LNGS, LATS, mode='exact')
+
+
+@pytest.mark.skipif(not GEOPY_AVAILABLE, reason='geopy is not installed')
+def test_exact_mode_is_within_haversine_error():
+    exact = distance_km(36.82, -1.29, LNGS, LATS, mode='exact')
+    assert np.allclose(exact, distance_km(36.82, -1.29, LNGS, LATS), rtol=0.006)
@@ -0,0 +1,123 @@
+"""Circuit breaker and retries of services.http_client"""
+import pytest
+import requests
+
+from services.http_client import CircuitBreaker, CircuitOpenError, OutboundClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def scripted_client(outcomes, clock=None, **options):
+    """OutboundClient whose session answers with `outcomes` in order (status codes or exceptions)"""
+    options.setdefault('backoff', 0)
+    client = OutboundClient('test', clock=clock or FakeClock(), **options)
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(kwargs['timeout'])
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+    client.session.request = request
+    return client, calls
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    clock.now = 29.9
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial call at a time
+
+
+def test_half_open_trial_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+
+
+def test_client_breaker_uses_the_client_clock():
+    clock = FakeClock()
+    client, calls = scripted_client([500, 200], clock=clock, failure_threshold=1, reset_timeout=30)
+    assert client.get('http://upstream').status_code == 500
+
+    with pytest.raises(CircuitOpenError):
+        client.get('http://upstream')
+    clock.now = 30
+    assert client.get('http://upstream').status_code == 200
+    assert client.breaker.state == 'closed'
+    assert len(calls) == 2
+
+
+def test_retries_connection_errors_and_retryable_statuses():
+    client, calls = scripted_client([requests.ConnectionError(), 503, 200], retries=2)
+    assert client.get('http://upstream').status_code == 200
+    assert len(calls) == 3
+    assert client.breaker.failures == 0
+
+
+def test_gives_up_after_the_retry_limit():
+    client, calls = scripted_client([503, 429, 503], retries=2)
+    assert client.get('http://upstream').status_code == 503
+    assert len(calls) == 3
+    assert client.breaker.failures == 1
+
+
+def test_read_timeouts_and_server_errors_are_not_retried():
+    client, calls = scripted_client([requests.ReadTimeout()], retries=2)
+    with pytest.raises(requests.ReadTimeout):
+        client.get('http://upstream')
+    assert len(calls) == 1
+
+    client, calls = scripted_client([500], retries=2)
+    assert client.get('http://upstream').status_code == 500
+    assert len(calls) == 1
+
+
+def test_attempts_share_the_deadline():
+    clock = FakeClock()
+    client, calls = scripted_client([], clock=clock, timeout=5, deadline=8, retries=3)
+
+    def slow_failure(method, url, **kwargs):
+        calls.append(kwargs['timeout'])
+        clock.now += kwargs['timeout']
+        raise requests.ConnectionError()
+
+    client.session.request = slow_failure
+    with pytest.raises(requests.ConnectionError):
+        client.get('http://upstream')
+    assert calls == [5, 3]
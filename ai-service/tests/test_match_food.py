@@ -0,0 +1,33 @@
+"""/api/match/food request decoding"""
+import copy
+
+import app
+from benchmarks import datagen
+
+
+def post_match(food_item, recipients):
+    response = app.app.test_client().post('/api/match/food', json={'food_item': food_item, 'recipients': recipients})
+    return response.status_code, response.get_json()
+
+
+def test_null_fields_score_like_missing_ones():
+    food_item = datagen.make_food_item(0, hours_to_expiry=6)
+    recipients = datagen.make_recipients(50, seed=0, spread_deg=0.2)
+
+    nulled_food = dict(food_item, category=None, dietaryInfo=None, estimatedValue=None)
+    nulled_recipients = copy.deepcopy(recipients)
+    for recipient in nulled_recipients:
+        recipient['profile'].update(dietaryRestrictions=None, preferredCategories=None, servingCapacity=None)
+
+    missing_food = {key: value for key, value in food_item.items()
+                    if key not in ('category', 'dietaryInfo', 'estimatedValue')}
+    missing_recipients = copy.deepcopy(recipients)
+    for recipient in missing_recipients:
+        for key in ('dietaryRestrictions', 'preferredCategories', 'servingCapacity'):
+            recipient['profile'].pop(key, None)
+
+    status, nulled = post_match(nulled_food, nulled_recipients)
+    assert status == 200
+    assert nulled['matches']
+    assert nulled == post_match(missing_food, missing_recipients)[1]
+    assert all(match['estimated_impact']['money_saved_usd'] == 0 for match in nulled['matches'])
@@ -0,0 +1,115 @@
+"""Ranking sessions: /api/match/session routes and RankingSessionStore"""
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app
+from benchmarks import datagen
+from models.ranking_session import RankingSession, RankingSessionStore
+from models.recipient_store import RecipientStore
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    clock = FakeClock()
+    store = RankingSessionStore(directory=str(tmp_path), ttl=100, clock=clock)
+    monkeypatch.setattr(app, 'match_sessions', store)
+    return store, clock
+
+
+def make_session(hours_to_expiry=5, count=40):
+    food_items = [datagen.make_food_item(seed, hours_to_expiry=hours_to_expiry) for seed in range(3)]
+    store = RecipientStore.from_recipients(datagen.make_recipients(count, spread_deg=0.2))
+    return RankingSession(food_items, store, store.rows(), [app.expiry_epoch(item) for item in food_items])
+
+
+def create(client, **payload):
+    payload.setdefault('food_items', [datagen.make_food_item(seed) for seed in range(3)])
+    payload.setdefault('recipients', datagen.make_recipients(40, spread_deg=0.2))
+    response = client.post('/api/match/session', json=payload)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_refresh_returns_the_created_rankings(sessions):
+    client = app.app.test_client()
+    created = create(client)
+    assert created['rankings'][0]['matches']
+
+    refreshed = client.get(f"/api/match/session/{created['session_id']}").get_json()
+    assert refreshed['rankings'] == created['rankings']
+
+
+def test_other_workers_load_sessions_from_the_directory(sessions, tmp_path):
+    store, clock = sessions
+    created = create(app.app.test_client())
+
+    other_worker = RankingSessionStore(directory=str(tmp_path), ttl=100, clock=clock)
+    session = other_worker.get(created['session_id'])
+    assert session.rank(time.time()) == created['rankings']
+
+
+def test_unknown_malformed_and_expired_sessions_are_not_found(sessions, tmp_path):
+    store, clock = sessions
+    client = app.app.test_client()
+    assert client.get('/api/match/session/' + '0' * 32).status_code == 404
+    assert client.get('/api/match/session/..%2Fsecrets').status_code == 404
+
+    session_id = create(client)['session_id']
+    clock.now += 100
+    assert client.get(f'/api/match/session/{session_id}').status_code == 404
+    assert not (tmp_path / f'{session_id}.npz').exists()
+
+
+def test_corrupt_session_file_is_a_server_error(sessions, tmp_path):
+    store, clock = sessions
+    session_id = 'a' * 32
+    path = tmp_path / f'{session_id}.npz'
+    path.write_bytes(b'not a session')
+    # Written "now" by the fake clock so it is not treated as expired
+    os.utime(path, (clock.now, clock.now))
+
+    response = app.app.test_client().get(f'/api/match/session/{session_id}')
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Session refresh failed'}
+
+
+def test_delete_removes_the_session(sessions):
+    client = app.app.test_client()
+    session_id = create(client)['session_id']
+    assert client.delete(f'/api/match/session/{session_id}').status_code == 200
+    assert client.get(f'/api/match/session/{session_id}').status_code == 404
+
+
+def test_memory_is_bounded_by_cached_pairs():
+    first, second = make_session(), make_session()
+    store = RankingSessionStore(cache_pairs=first.pairs + second.pairs - 1)
+    store.set('1' * 32, first)
+    store.set('2' * 32, second)
+    assert store.get('1' * 32) is None
+    assert store.get('2' * 32) is second
+
+
+def test_utc_expiry_times_decay_urgency():
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=3)
+    food_item = {'expiresAt': expires_at.isoformat().replace('+00:00', 'Z')}
+    epoch = app.expiry_epoch(food_item)
+    assert epoch == pytest.approx(expires_at.timestamp())
+    assert math.isnan(app.expiry_epoch({'expiresAt': 'tomorrow'}))
+
+    session = make_session()
+    session.expiry_epochs[:] = epoch
+    now = time.time()
+    assert session.rank(now)[0]['urgency_score'] == 0.8
+    assert session.rank(now + 2 * 3600)[0]['urgency_score'] == 1.0
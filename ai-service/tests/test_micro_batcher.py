@@ -0,0 +1,87 @@
+"""Coalescing concurrent calls with MicroBatcher"""
+import multiprocessing
+import threading
+
+import pytest
+
+from services.micro_batcher import MicroBatcher
+
+
+class RecordingHandler:
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate = gate
+
+    def __call__(self, items):
+        if self.gate is not None:
+            self.gate.wait(2)
+        self.batches.append(list(items))
+        return [item * 10 for item in items]
+
+
+def submit_concurrently(batcher, items):
+    results = {}
+
+    def submit(item):
+        results[item] = batcher.submit(item)
+
+    threads = [threading.Thread(target=submit, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_submit_returns_its_result():
+    handler = RecordingHandler()
+    assert MicroBatcher(handler).submit(4) == 40
+    assert handler.batches == [[4]]
+
+
+def test_concurrent_submits_are_batched_up_to_the_limit():
+    gate = threading.Event()
+    handler = RecordingHandler(gate)
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait=0.2)
+
+    threading.Timer(0.3, gate.set).start()
+    results = submit_concurrently(batcher, range(10))
+
+    assert results == {item: item * 10 for item in range(10)}
+    assert sorted(item for batch in handler.batches for item in batch) == list(range(10))
+    assert all(len(batch) <= 4 for batch in handler.batches)
+    assert len(handler.batches) < 10
+
+
+def test_handler_errors_reach_every_caller_in_the_batch():
+    def failing(items):
+        raise RuntimeError('upstream down')
+
+    batcher = MicroBatcher(failing, max_wait=0.05)
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
+    # The worker survives and handles later batches
+    batcher.handler = RecordingHandler()
+    assert batcher.submit(2) == 20
+
+
+def test_wrong_number_of_results_is_an_error():
+    batcher = MicroBatcher(lambda items: [], max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
+
+
+def submit_in_child(batcher, results):
+    results.put(batcher.submit(7))
+
+
+def test_forked_processes_start_their_own_worker():
+    batcher = MicroBatcher(RecordingHandler())
+    assert batcher.submit(1) == 10
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=submit_in_child, args=(batcher, results))
+    child.start()
+    assert results.get(timeout=5) == 70
+    child.join()
@@ -0,0 +1,74 @@
+"""Online surplus averages and their shared checkpoint"""
+import pytest
+
+from models.outcome_learner import OutcomeLearner
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def outcomes(business_id, *surpluses):
+    return [{'business_id': business_id, 'surplus_kg': surplus} for surplus in surpluses]
+
+
+def test_average_needs_min_observations():
+    learner = OutcomeLearner(alpha=0.5, min_observations=3)
+    learner.ingest(outcomes('b1', 10, 20))
+    assert learner.average('b1') is None
+
+    learner.ingest(outcomes('b1', 20))
+    assert learner.average('b1') == 17.5
+    assert learner.describe('b1')['observations'] == 3
+
+
+def test_malformed_batch_is_rejected_whole():
+    learner = OutcomeLearner()
+    with pytest.raises(ValueError):
+        learner.ingest(outcomes('b1', 10) + [{'business_id': 'b1', 'surplus_kg': -1}])
+    with pytest.raises(ValueError):
+        learner.ingest([{'surplus_kg': 5}])
+    assert len(learner) == 0
+
+
+def test_workers_replay_pending_outcomes_onto_the_checkpoint(tmp_path):
+    path = str(tmp_path / 'outcomes.json')
+    clock = FakeClock()
+    first = OutcomeLearner(checkpoint_path=path, checkpoint_interval=60, clock=clock)
+    second = OutcomeLearner(checkpoint_path=path, checkpoint_interval=60, clock=clock)
+
+    first.ingest(outcomes('b1', 10, 10, 10))
+    second.ingest(outcomes('b1', 50, 50, 50))
+    assert first.checkpoint() and second.checkpoint()
+
+    expected = OutcomeLearner()
+    expected.ingest(outcomes('b1', 10, 10, 10, 50, 50, 50))
+    third = OutcomeLearner(checkpoint_path=path, clock=clock)
+    assert third.describe('b1')['observations'] == 6
+    assert third.average('b1') == expected.average('b1')
+
+    clock.now = 60
+    first.refresh()
+    assert first.describe('b1')['observations'] == 6
+
+
+def test_refresh_writes_due_pending_outcomes(tmp_path):
+    path = str(tmp_path / 'outcomes.json')
+    clock = FakeClock()
+    writer = OutcomeLearner(checkpoint_path=path, checkpoint_interval=60, clock=clock)
+    reader = OutcomeLearner(checkpoint_path=path, checkpoint_interval=60, clock=clock)
+
+    writer.ingest(outcomes('b1', 12, 12, 12))
+    writer.refresh()
+    assert not (tmp_path / 'outcomes.json').exists()
+
+    # No further ingest: the next prediction's refresh writes them
+    clock.now = 60
+    writer.refresh()
+    reader.refresh()
+    assert reader.average('b1') == 12
+    assert writer.describe('b1')['observations'] == 3
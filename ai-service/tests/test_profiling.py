@@ -0,0 +1,75 @@
+"""Opt-in request profiling"""
+import os
+
+import pytest
+from flask import Flask
+
+from services.profiling import init_profiling
+
+
+def make_app(monkeypatch, tmp_path, token=None, sample_rate=0):
+    monkeypatch.setenv('PROFILING_ENABLED', 'true')
+    monkeypatch.setenv('PROFILING_DIR', str(tmp_path))
+    monkeypatch.setenv('PROFILING_SAMPLE_RATE', str(sample_rate))
+    monkeypatch.setenv('PROFILING_MAX_FILES', '2')
+    if token:
+        monkeypatch.setenv('PROFILING_ADMIN_TOKEN', token)
+    else:
+        monkeypatch.delenv('PROFILING_ADMIN_TOKEN', raising=False)
+
+    app = Flask(__name__)
+
+    @app.route('/work')
+    def work():
+        return 'done'
+
+    return app, init_profiling(app)
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('PROFILING_ENABLED', raising=False)
+    assert init_profiling(Flask(__name__)) is None
+
+
+def test_token_triggers_a_profile(monkeypatch, tmp_path):
+    app, store = make_app(monkeypatch, tmp_path, token='secret')
+    client = app.test_client()
+
+    client.get('/work', headers={'X-Profile': 'wrong'})
+    assert store.list() == []
+    client.get('/work', headers={'X-Profile': 'secret'})
+    client.get('/work?profile=secret')
+    assert len(store.list()) == 2
+
+
+def test_header_is_ignored_without_a_token(monkeypatch, tmp_path):
+    app, store = make_app(monkeypatch, tmp_path)
+    client = app.test_client()
+    client.get('/work', headers={'X-Profile': 'anything'})
+    client.get('/work?profile=1')
+    assert store.list() == []
+
+
+def test_sampling_works_without_a_token(monkeypatch, tmp_path):
+    app, store = make_app(monkeypatch, tmp_path, sample_rate=1)
+    app.test_client().get('/work')
+    assert len(store.list()) == 1
+
+
+def test_store_keeps_the_newest_files(monkeypatch, tmp_path):
+    app, store = make_app(monkeypatch, tmp_path, sample_rate=1)
+    client = app.test_client()
+    for _ in range(4):
+        client.get('/work')
+    assert len(os.listdir(tmp_path)) == 2
+
+
+@pytest.mark.parametrize('token, header, status', [
+    (None, {}, 403),
+    (None, {'X-Admin-Token': ''}, 403),
+    ('secret', {'X-Admin-Token': 'wrong'}, 403),
+    ('secret', {'X-Admin-Token': 'secret'}, 200),
+])
+def test_admin_listing_needs_the_token(monkeypatch, tmp_path, token, header, status):
+    app, store = make_app(monkeypatch, tmp_path, token=token)
+    assert app.test_client().get('/api/admin/profiles', headers=header).status_code == status
@@ -0,0 +1,106 @@
+"""Grid-indexed recipient registry and its shared snapshot"""
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from benchmarks import datagen
+from models.geo import haversine_km
+from models.recipient_index import RecipientRegistry
+
+
+def recipient(recipient_id, lng, lat, **profile):
+    return {'_id': recipient_id, 'name': f'Org {recipient_id}',
+            'profile': dict(profile, location={'type': 'Point', 'coordinates': [lng, lat]})}
+
+
+def brute_force_radius(recipients, lng, lat, radius_km):
+    lngs = np.array([r['profile']['location']['coordinates'][0] for r in recipients])
+    lats = np.array([r['profile']['location']['coordinates'][1] for r in recipients])
+    distances = haversine_km(lng, lat, lngs, lats)
+    return [r['_id'] for r, distance in zip(recipients, distances) if distance <= radius_km]
+
+
+@pytest.mark.parametrize('radius_km', [5, 30, 120])
+def test_query_radius_matches_brute_force(radius_km):
+    recipients = datagen.make_recipients(500, spread_deg=2)
+    registry = RecipientRegistry(cell_size_deg=0.25)
+    registry.upsert(recipients)
+
+    found = [r['_id'] for r in registry.query_radius(datagen.CENTER_LNG, datagen.CENTER_LAT, radius_km)]
+    assert found == brute_force_radius(recipients, datagen.CENTER_LNG, datagen.CENTER_LAT, radius_km)
+
+
+def test_nearest_returns_the_closest_first():
+    recipients = datagen.make_recipients(300, spread_deg=3)
+    registry = RecipientRegistry(cell_size_deg=0.1)
+    registry.upsert(recipients)
+
+    nearest = registry.nearest(datagen.CENTER_LNG, datagen.CENTER_LAT, 7)
+    everyone = brute_force_radius(recipients, datagen.CENTER_LNG, datagen.CENTER_LAT, 1e6)
+    lngs = np.array([r['profile']['location']['coordinates'][0] for r in recipients])
+    lats = np.array([r['profile']['location']['coordinates'][1] for r in recipients])
+    order = np.argsort(haversine_km(datagen.CENTER_LNG, datagen.CENTER_LAT, lngs, lats), kind='stable')
+    assert [r['_id'] for r in nearest] == [everyone[i] for i in order[:7]]
+
+
+def test_queries_cross_the_antimeridian():
+    registry = RecipientRegistry()
+    registry.upsert([recipient('east', 179.95, 0), recipient('west', -179.95, 0), recipient('far', 170, 0)])
+    assert [r['_id'] for r in registry.query_radius(179.99, 0, 20)] == ['east', 'west']
+
+
+def test_upsert_replaces_and_remove_counts():
+    registry = RecipientRegistry()
+    registry.upsert([recipient('a', 36.8, -1.3), recipient('b', 36.9, -1.2)])
+    registry.upsert([recipient('a', 10, 10)])
+    assert len(registry) == 2
+    assert registry.query_radius(36.8, -1.3, 1) == []
+    assert [r['_id'] for r in registry.query_radius(10, 10, 1)] == ['a']
+
+    assert registry.remove(['a', 'missing']) == 1
+    assert len(registry) == 1
+
+
+def test_invalid_recipients_are_rejected_before_any_change():
+    registry = RecipientRegistry()
+    with pytest.raises(ValueError):
+        registry.upsert([recipient('a', 1, 1), {'profile': {}}])
+    with pytest.raises(ValueError):
+        registry.upsert([{'_id': 'b', 'profile': {'location': {'coordinates': [1]}}}])
+    assert len(registry) == 0
+
+
+def test_workers_see_each_others_changes(tmp_path):
+    path = str(tmp_path / 'recipients.json')
+    first = RecipientRegistry(snapshot_path=path)
+    second = RecipientRegistry(snapshot_path=path)
+
+    first.upsert([recipient('a', 36.8, -1.3, servingCapacity=40)])
+    second.upsert([recipient('b', 36.9, -1.2)])
+    assert len(first) == 2
+    assert first.nearest(36.8, -1.3, 1)[0]['profile']['servingCapacity'] == 40
+
+    first.remove(['b'])
+    assert [r['_id'] for r in second.nearest(36.8, -1.3, 5)] == ['a']
+    assert len(RecipientRegistry(snapshot_path=path)) == 1
+
+
+def register_many(path, worker, count):
+    registry = RecipientRegistry(snapshot_path=path)
+    for i in range(count):
+        registry.upsert([recipient(f'{worker}-{i}', 36.8 + worker * 0.01, -1.3 + i * 0.001)])
+    registry.remove([f'{worker}-0'])
+
+
+def test_concurrent_writers_lose_no_changes(tmp_path):
+    path = str(tmp_path / 'recipients.json')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=register_many, args=(path, worker, 15)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    assert len(RecipientRegistry(snapshot_path=path)) == 4 * 14
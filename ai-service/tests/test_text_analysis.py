@@ -0,0 +1,42 @@
+"""Whole-word keyword matching in models.text_analysis"""
+import pytest
+
+from models.text_analysis import analyze_text, find_keywords
+
+
+@pytest.mark.parametrize('description, expected', [
+    ('Fresh bread', {'fresh', 'bread'}),
+    ('FRESH, delicious bread!', {'fresh', 'delicious', 'bread'}),
+    ('cookies and candies', {'cookie', 'candy'}),
+    ('boxes of tomatoes', {'tomato'}),
+    ('day old pastries', {'day old', 'old', 'pastry'}),
+    ('day\n  old', {'day old', 'old'}),
+    ('just made today', {'just made', 'today'}),
+    ('(milk)/cheese', {'milk', 'cheese'}),
+])
+def test_keywords_are_found_as_whole_words(description, expected):
+    assert find_keywords(description) == expected
+
+
+@pytest.mark.parametrize('description', [
+    'newspaper', 'renewed', 'teapot', 'oldest', 'goodness', 'breadcrumbs', 'mealworm',
+    'candyfloss', 'icecream', 'un_fresh', 'fresh2'
+])
+def test_keywords_inside_other_words_are_not_found(description):
+    assert find_keywords(description) == set()
+
+
+def test_two_word_keywords_need_both_words_in_order():
+    assert find_keywords('day-old bread') == {'old', 'bread'}
+    assert find_keywords('old day') == {'old'}
+    assert find_keywords('someday old') == {'old'}
+    assert find_keywords('just maker') == set()
+
+
+def test_analyze_text():
+    assert analyze_text('Fresh bread and milk, baked today') == {
+        'categories': ['bakery', 'dairy'], 'freshness': 'high', 'quality_score': pytest.approx(0.8)
+    }
+    assert analyze_text('Day old leftover rolls, a bit stale') == {
+        'categories': ['other'], 'freshness': 'medium', 'quality_score': pytest.approx(0.3)
+    }
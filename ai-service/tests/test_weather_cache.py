@@ -0,0 +1,137 @@
+"""Per-cell weather caching, stale-while-revalidate and miss coalescing"""
+import threading
+import time
+
+import pytest
+
+from services.weather_cache import WeatherCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingFetch:
+    def __init__(self, results=None):
+        self.calls = []
+        self.results = results
+
+    def __call__(self, lat, lng):
+        self.calls.append((lat, lng))
+        if self.results is not None:
+            return self.results.pop(0)
+        return {'cell': (lat, lng), 'call': len(self.calls)}
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_locations_in_one_cell_share_an_entry():
+    fetch = CountingFetch()
+    cache = WeatherCache(fetch, precision=1)
+    assert cache.get(-1.2921, 36.8219) is cache.get(-1.31, 36.79)
+    cache.get(-1.5, 36.8)
+    assert fetch.calls == [(-1.3, 36.8), (-1.5, 36.8)]
+
+
+def test_failed_fetches_are_not_cached():
+    fetch = CountingFetch(results=[None, {'temp': 20}])
+    cache = WeatherCache(fetch)
+    assert cache.get(1, 1) is None
+    assert cache.get(1, 1) == {'temp': 20}
+    assert len(fetch.calls) == 2
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    clock = FakeClock()
+    release = threading.Event()
+    fetch = CountingFetch()
+
+    def slow_fetch(lat, lng):
+        if fetch.calls:
+            release.wait(2)
+        return fetch(lat, lng)
+
+    cache = WeatherCache(slow_fetch, ttl=10, stale_ttl=20, clock=clock)
+    first = cache.get(1, 1)
+
+    clock.now = 15
+    assert cache.get(1, 1) is first
+    assert cache.get(1, 1) is first
+    release.set()
+    wait_until(lambda: len(fetch.calls) == 2 and cache.get(1, 1) is not first)
+    assert len(fetch.calls) == 2
+    assert cache.get(1, 1)['call'] == 2
+
+
+def test_entries_past_the_stale_window_are_fetched_again():
+    clock = FakeClock()
+    fetch = CountingFetch()
+    cache = WeatherCache(fetch, ttl=10, stale_ttl=20, clock=clock)
+    cache.get(1, 1)
+
+    clock.now = 30
+    assert cache.get(1, 1)['call'] == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    started = threading.Event()
+    release = threading.Event()
+    fetch = CountingFetch()
+
+    def slow_fetch(lat, lng):
+        started.set()
+        release.wait(2)
+        return fetch(lat, lng)
+
+    cache = WeatherCache(slow_fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(1, 1))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(2)
+    wait_until(lambda: cache._cache.misses == 8)
+    time.sleep(0.05)  # let every thread reach the shared fetch
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetch.calls) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_fetch_errors_reach_every_waiter():
+    release = threading.Event()
+
+    def failing_fetch(lat, lng):
+        release.wait(2)
+        raise RuntimeError('upstream down')
+
+    cache = WeatherCache(failing_fetch)
+    errors = []
+
+    def get():
+        try:
+            cache.get(1, 1)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache._cache.misses == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+
+    with pytest.raises(RuntimeError):
+        cache.get(1, 1)